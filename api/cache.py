@@ -0,0 +1,172 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+
+from .compression import compress, get_encoding, set_encoding
+from .replicas import use_primary
+
+VERSION_KEY = 'api:cache:version:{}'
+ENTRY_KEY = 'api:cache:entry:{}'
+LOCK_KEY = 'api:cache:lock:{}'
+BUMPED_KEY = 'api:cache:bumped:{}'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_versions(namespaces):
+    # Missing versions are seeded from the clock, so an evicted version can
+    # never make an entry written under an older one look fresh again.
+    cache = get_cache()
+    keys = [VERSION_KEY.format(namespace) for namespace in namespaces]
+    versions = cache.get_many(keys)
+
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+
+    return tuple(versions[key] for key in keys)
+
+
+def bump_version(namespace):
+    cache = get_cache()
+    # set before the new version is visible, see read_primary_after_bump
+    if settings.DATABASE_REPLICAS:
+        cache.set(BUMPED_KEY.format(namespace), 1, timeout=settings.API_CACHE_PRIMARY_TIMEOUT)
+
+    key = VERSION_KEY.format(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def read_primary_after_bump(cache, namespaces):
+    # a replica may not have applied the write behind a recent bump yet, and
+    # the entry refilled from it would be stored under the new version
+    if settings.DATABASE_REPLICAS and cache.get_many([BUMPED_KEY.format(namespace) for namespace in namespaces]):
+        use_primary()
+
+
+def invalidate(*namespaces):
+    def bump():
+        for namespace in namespaces:
+            bump_version(namespace)
+
+    transaction.on_commit(bump)
+
+
+def get_user_state(request):
+    user = request.user
+    if user and user.is_staff:
+        return 'staff'
+    if user and user.is_authenticated:
+        return 'user'
+    return 'anon'
+
+
+def get_cache_key(request):
+    # bodies hold absolute URLs (photos, next and previous links)
+    query = sorted((key, sorted(values)) for key, values in request.query_params.lists())
+    raw = (f'{request.scheme}://{request.get_host()}{request.path}|{query}|{get_user_state(request)}'
+           f'|{request.accepted_media_type}')
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _from_entry(entry, state, request):
+    # entries hold every encoding already compressed, see _store
+    encoded = entry.get('encoded', {})
+    encoding = get_encoding(request, encoded) if encoded else None
+
+    response = HttpResponse(encoded[encoding] if encoding else entry['content'],
+                            status=entry['status'], content_type=entry['content_type'])
+    if encoded:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if encoding:
+        set_encoding(response, encoding)
+
+    response['X-Cache'] = state
+    return response
+
+
+def _render(view, request, response):
+    response.accepted_renderer = request.accepted_renderer
+    response.accepted_media_type = request.accepted_media_type
+    response.renderer_context = view.get_renderer_context()
+    return response.render()
+
+
+def _store(cache, key, versions, response, compression):
+    encoded = {}
+    if compression and len(response.content) >= compression['min_size']:
+        encoded = compress(response.content, compression)
+
+    entry = {
+        'content': response.content,
+        'encoded': encoded,
+        'content_type': response['Content-Type'],
+        'status': response.status_code,
+        'versions': versions,
+        'expires': time.time() + settings.API_CACHE_TIMEOUT
+    }
+    cache.set(ENTRY_KEY.format(key), entry, timeout=settings.API_CACHE_TIMEOUT + settings.API_CACHE_STALE_TIMEOUT)
+    return entry
+
+
+def cache_response(method):
+    """
+    Cache the rendered JSON of a read action, invalidated through the view's
+    ``cache_dependencies``. While one request refreshes an outdated entry the
+    others are served the stale copy, or wait for it on a cold key.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return method(self, request, *args, **kwargs)
+
+        cache = get_cache()
+        key = get_cache_key(request)
+        versions = get_versions(self.cache_dependencies)
+        entry = cache.get(ENTRY_KEY.format(key))
+
+        if entry is not None and entry['versions'] == versions and entry['expires'] > time.time():
+            return _from_entry(entry, 'HIT', request)
+
+        lock = LOCK_KEY.format(key)
+        locked = cache.add(lock, 1, timeout=settings.API_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            if entry is not None:
+                return _from_entry(entry, 'STALE', request)
+
+            deadline = time.monotonic() + settings.API_CACHE_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = cache.get(ENTRY_KEY.format(key))
+                if entry is not None:
+                    return _from_entry(entry, 'HIT', request)
+
+        try:
+            read_primary_after_bump(cache, self.cache_dependencies)
+            response = _render(self, request, method(self, request, *args, **kwargs))
+            if response.status_code == status.HTTP_200_OK:
+                # set by api.compression.CompressionMiddleware
+                entry = _store(cache, key, versions, response, getattr(request, 'compression', None))
+                response = _from_entry(entry, 'MISS', request)
+        finally:
+            if locked:
+                cache.delete(lock)
+
+        response['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+# settings naming a cache that every web and worker process must share
+SHARED_CACHE_SETTINGS = ['API_COUNTER_CACHE_ALIAS', 'REVOKED_TOKEN_CACHE_ALIAS']
+
+PROCESS_LOCAL_CACHES = (LocMemCache, DummyCache)
+
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    errors = []
+    for name in SHARED_CACHE_SETTINGS:
+        alias = getattr(settings, name)
+        if alias is not None and isinstance(caches[alias], PROCESS_LOCAL_CACHES):
+            errors.append(Error(
+                f"{name} points to the process-local cache {alias!r}.",
+                hint="Set CACHE_URL to a shared cache, or set it to None.",
+                id='api.E001',
+            ))
+    return errors
@@ -0,0 +1,113 @@
+import gzip
+import zlib
+
+import brotli
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/csv')
+
+# the first acceptable encoding wins ties on quality
+ENCODERS = {
+    'br': lambda content, level: brotli.compress(content, quality=level),
+    'gzip': lambda content, level: gzip.compress(content, compresslevel=level, mtime=0),
+}
+
+STRONG_ETAG = _lazy_re_compile(r'^\s*"')
+
+
+def get_options(compression=None):
+    """
+    Merge a view's ``compression`` attribute over ``API_COMPRESSION``.
+    ``None`` turns compression off for the view.
+    """
+    if compression is None:
+        return None
+    return {**settings.API_COMPRESSION, **compression}
+
+
+def get_encoding(request, encodings):
+    accepted = {}
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        name, _, params = part.partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[name.strip().lower()] = quality
+
+    best, best_quality = None, 0
+    for encoding in ENCODERS:
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if encoding in encodings and quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content, options):
+    return {encoding: ENCODERS[encoding](content, level) for encoding, level in options['levels'].items()}
+
+
+def compress_stream(chunks, encoding, level):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        process, finish = compressor.compress, compressor.flush
+
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def set_encoding(response, encoding):
+    response['Content-Encoding'] = encoding
+    etag = response.get('ETag')
+    if etag and STRONG_ETAG.match(etag):
+        response['ETag'] = 'W/' + etag
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compress API responses with the best encoding the client accepts. Only
+    safe requests are compressed, so secrets in POST responses are never
+    mixed with attacker controlled input (BREACH).
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view = getattr(view_func, 'cls', None)
+        if view is not None:
+            # @action(compression=...) overrides the viewset's attribute
+            compression = getattr(view_func, 'initkwargs', {}).get('compression', getattr(view, 'compression', {}))
+            request.compression = get_options(compression)
+
+    def process_response(self, request, response):
+        options = getattr(request, 'compression', None)
+        if (not options or request.method not in ('GET', 'HEAD') or response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = get_encoding(request, options['levels'])
+        if encoding is None:
+            return response
+
+        level = options['levels'][encoding]
+        if response.streaming:
+            response.streaming_content = compress_stream(response.streaming_content, encoding, level)
+            del response['Content-Length']
+        else:
+            if len(response.content) < options['min_size']:
+                return response
+            response.content = ENCODERS[encoding](response.content, level)
+            response['Content-Length'] = str(len(response.content))
+
+        set_encoding(response, encoding)
+        return response
@@ -0,0 +1,147 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+
+from .models import Movie
+
+VIEWS_KEY = 'api:views:{}'
+DIRTY_KEY = 'api:views:dirty:{}'
+SLOT_KEY = 'api:views:slot:{}'
+SEQUENCE_KEY = 'api:views:sequence'
+FLUSHED_KEY = 'api:views:flushed'
+MISSING_KEY = 'api:views:missing'
+FLUSH_LOCK_KEY = 'api:views:lock'
+SLUG_KEY = 'api:views:slug:{}'
+
+
+def get_cache():
+    # None when no shared cache is configured, counters then go straight to
+    # the database (see api.checks)
+    if settings.API_COUNTER_CACHE_ALIAS is None:
+        return None
+    return caches[settings.API_COUNTER_CACHE_ALIAS]
+
+
+def _incr(cache, key, delta=1):
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, timeout=None):
+            return delta
+        return cache.incr(key, delta)
+
+
+def get_movie_id(slug):
+    cache = get_cache()
+    if cache is None:
+        return Movie.objects.filter(slug=slug).values_list('id', flat=True).first()
+
+    key = SLUG_KEY.format(slug)
+    movie_id = cache.get(key)
+    if movie_id is None:
+        movie_id = Movie.objects.filter(slug=slug).values_list('id', flat=True).first()
+        if movie_id is not None:
+            cache.set(key, movie_id, timeout=settings.API_COUNTER_SLUG_TIMEOUT)
+
+    return movie_id
+
+
+def forget_slugs(slugs):
+    # called when movies are renamed or deleted, see api.signals
+    cache = get_cache()
+    if cache is not None:
+        cache.delete_many([SLUG_KEY.format(slug) for slug in slugs if slug])
+
+
+def record_view(movie_id):
+    cache = get_cache()
+    if cache is None:
+        Movie.objects.filter(id=movie_id).update(view=F('view') + 1)
+        return
+
+    _incr(cache, VIEWS_KEY.format(movie_id))
+
+    # Only the first hit since the last flush registers the movie in a slot,
+    # so the flusher reads one slot per dirty movie instead of one per hit.
+    # The marker expires in case its slot was never written.
+    if cache.add(DIRTY_KEY.format(movie_id), 1, timeout=settings.API_COUNTER_DIRTY_TIMEOUT):
+        slot = _incr(cache, SEQUENCE_KEY)
+        cache.set(SLOT_KEY.format(slot), movie_id, timeout=None)
+
+
+def _collect_dirty(cache):
+    start = cache.get(FLUSHED_KEY, 0)
+    end = cache.get(SEQUENCE_KEY, 0)
+    slots = cache.get_many([SLOT_KEY.format(n) for n in range(start + 1, end + 1)])
+
+    # A slot can be reserved but not written yet. Stop before it, unless it
+    # was already missing on the previous flush and its writer is gone.
+    flushed = start
+    missing = cache.get(MISSING_KEY)
+    for n in range(start + 1, end + 1):
+        if SLOT_KEY.format(n) not in slots and n != missing:
+            cache.set(MISSING_KEY, n, timeout=None)
+            break
+        flushed = n
+
+    movie_ids = {slots[SLOT_KEY.format(n)] for n in range(start + 1, flushed + 1) if SLOT_KEY.format(n) in slots}
+    return movie_ids, [SLOT_KEY.format(n) for n in range(start + 1, flushed + 1)], flushed
+
+
+def _claim(cache, movie_ids):
+    cache.delete_many([DIRTY_KEY.format(movie_id) for movie_id in movie_ids])
+    counts = cache.get_many([VIEWS_KEY.format(movie_id) for movie_id in movie_ids])
+
+    claimed = {}
+    for movie_id in movie_ids:
+        count = counts.get(VIEWS_KEY.format(movie_id))
+        if count:
+            # decrement by what was read, hits landing meanwhile are kept
+            cache.decr(VIEWS_KEY.format(movie_id), count)
+            claimed[movie_id] = count
+
+    return claimed
+
+
+def _apply(claimed, batch_size):
+    items = list(claimed.items())
+
+    with transaction.atomic():
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            Movie.objects.filter(id__in=[movie_id for movie_id, _ in batch]).update(
+                view=F('view') + Case(
+                    *[When(id=movie_id, then=Value(count)) for movie_id, count in batch],
+                    default=Value(0),
+                    output_field=PositiveIntegerField()
+                )
+            )
+
+
+def flush_views(batch_size=None):
+    batch_size = batch_size or settings.API_COUNTER_BATCH_SIZE
+    cache = get_cache()
+    if cache is None:
+        return 0
+
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=settings.API_COUNTER_LOCK_TIMEOUT):
+        return 0
+
+    try:
+        movie_ids, slots, flushed = _collect_dirty(cache)
+        claimed = _claim(cache, movie_ids)
+
+        try:
+            _apply(claimed, batch_size)
+        except Exception:
+            for movie_id, count in claimed.items():
+                _incr(cache, VIEWS_KEY.format(movie_id), count)
+            raise
+
+        cache.delete_many(slots)
+        cache.set(FLUSHED_KEY, flushed, timeout=None)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+    return sum(claimed.values())
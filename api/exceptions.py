@@ -1,7 +1,8 @@
 from rest_framework.views import exception_handler
-from rest_framework.response import Response
 from rest_framework import status
 
+from .responses import error_response
+
 
 def exception(exc, context):
     response = exception_handler(exc, context)
@@ -16,22 +17,9 @@ def exception(exc, context):
 
         error_msg = error_msg.get('detail', error_msg)
 
-        return Response({
-            'data': None,
-            'error': {
-                'errorId': response.status_code,
-                'isFriendly': True,
-                'errorMsg': error_msg
-            },
-            'success': False
-        }, status=response.status_code)
-
-    return Response({
-        'data': None,
-        'error': {
-            'errorId': status.HTTP_500_INTERNAL_SERVER_ERROR,
-            'isFriendly': False,
-            'errorMsg': "Internal server error."
-        },
-        'success': False
-    }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        # keep Retry-After and WWW-Authenticate set by DRF
+        headers = {name: value for name, value in response.items() if name != 'Content-Type'}
+
+        return error_response(response.status_code, error_msg, headers=headers)
+
+    return error_response(status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error.", friendly=False)
@@ -0,0 +1,33 @@
+import csv
+import json
+
+from .renderers import dumps
+
+EXPORT_COLUMNS = ['id', 'title', 'slug', 'description', 'country', 'genre', 'duration', 'language', 'year',
+                  'age_limit', 'like', 'dislike', 'view', 'photo', 'created_at', 'video_items']
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def export_ndjson(rows):
+    for row in rows:
+        yield dumps(row) + b'\n'
+
+
+def export_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        row['country'] = row['country']['slug']
+        row['genre'] = ','.join(genre['slug'] for genre in row['genre'])
+        row['video_items'] = json.dumps(row['video_items'], ensure_ascii=False)
+        yield writer.writerow([row[column] for column in EXPORT_COLUMNS])
+
+
+EXPORT_FORMATS = {
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+    'csv': (export_csv, 'text/csv'),
+}
@@ -0,0 +1,53 @@
+from django.db.models import Count
+from django_filters.utils import translate_validation
+
+from .filters import MovieFilter
+from .models import Movie
+from .search import get_backend
+
+# facet name: (grouped fields, output keys)
+FACETS = {
+    'genre': (('genre__slug', 'genre__name'), ('slug', 'name')),
+    'country': (('country__slug', 'country__name'), ('slug', 'name')),
+    'year': (('year',), ('value',)),
+    'language': (('language',), ('value',)),
+    'age_limit': (('age_limit',), ('value',)),
+}
+
+
+def filter_movies(params, search):
+    filterset = MovieFilter(params, queryset=Movie.objects.all())
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+
+    queryset = filterset.qs
+    if search:
+        queryset = get_backend().search(queryset, search)
+    return queryset
+
+
+def get_facets(params, search=''):
+    """
+    Count movies per value of every ``MovieFilter`` dimension. Each facet
+    ignores its own filter, so the counts show what selecting another value
+    would return. One GROUP BY query is run per facet.
+    """
+    facets = {}
+    for name, (fields, keys) in FACETS.items():
+        others = params.copy()
+        others.pop(name, None)
+
+        movies = Movie.objects.all()
+        if any(others.get(field) for field in MovieFilter.base_filters) or search:
+            movies = movies.filter(id__in=filter_movies(others, search).values('id'))
+
+        # genre__slug is NULL for movies without genres
+        rows = (movies
+                .filter(**{f'{fields[0]}__isnull': False})
+                .values_list(*fields)
+                .annotate(count=Count('id'))
+                .order_by('-count', *fields))
+
+        facets[name] = [dict(zip(keys + ('count',), row)) for row in rows]
+
+    return facets
@@ -1,12 +1,34 @@
 import django_filters
-from .models import Movie
+from rest_framework import filters
+
+from .models import Movie, MovieURL, AGE_LIMITS, LANGUAGE_CHOICES, TYPES_CHOICE
+from .search import get_backend
 
 
 class MovieFilter(django_filters.FilterSet):
     genre = django_filters.CharFilter(field_name='genre__slug', lookup_expr='iexact')
-    year = django_filters.NumberFilter(field_name='year', lookup_expr='iexact')
+    year = django_filters.NumberFilter(field_name='year')
     country = django_filters.CharFilter(field_name='country__slug', lookup_expr='iexact')
+    language = django_filters.ChoiceFilter(choices=LANGUAGE_CHOICES)
+    age_limit = django_filters.ChoiceFilter(choices=AGE_LIMITS)
 
     class Meta:
         model = Movie
-        fields = ['genre', 'year', 'country']
+        fields = ['genre', 'year', 'country', 'language', 'age_limit']
+
+
+class EpisodeFilter(django_filters.FilterSet):
+    type = django_filters.ChoiceFilter(choices=TYPES_CHOICE)
+
+    class Meta:
+        model = MovieURL
+        fields = ['type']
+
+
+class MovieSearchFilter(filters.SearchFilter):
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+
+        return get_backend().search(queryset, query)
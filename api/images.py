@@ -0,0 +1,113 @@
+import hashlib
+from base64 import b64encode
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .cache import invalidate
+from .models import Movie
+
+VARIANT_PATH = 'movies/variants/{hash}/{width}.{extension}'
+
+# format name: (Pillow format, file extension)
+FORMATS = {
+    'webp': ('WEBP', 'webp'),
+    'jpeg': ('JPEG', 'jpg'),
+}
+
+PLACEHOLDER_SIZE = 16
+
+
+def get_hash(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode(image, image_format, **options):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def _resize(image, width):
+    image = image.copy()
+    # only ever shrinks, the height follows the aspect ratio
+    image.thumbnail((width, image.height), Image.LANCZOS)
+    return image
+
+
+def get_placeholder(image):
+    image = _resize(image, PLACEHOLDER_SIZE)
+    content = _encode(image, 'JPEG', quality=40)
+    return f'data:image/jpeg;base64,{b64encode(content).decode()}'
+
+
+def build_variants(image, photo_hash):
+    variants = {name: {} for name in FORMATS}
+
+    for width in settings.MOVIE_PHOTO_WIDTHS:
+        resized = None
+        for name, (image_format, extension) in FORMATS.items():
+            path = VARIANT_PATH.format(hash=photo_hash, width=width, extension=extension)
+
+            # paths are keyed by content, an existing file is already up to date
+            if not default_storage.exists(path):
+                resized = resized or _resize(image, width)
+                content = _encode(resized, image_format, quality=settings.MOVIE_PHOTO_QUALITY)
+                path = default_storage.save(path, ContentFile(content))
+
+            variants[name][str(width)] = path
+
+    return variants
+
+
+def delete_variants(photo_hash, variants):
+    # another movie may still use the same poster
+    if not photo_hash or Movie.objects.filter(photo_hash=photo_hash).exists():
+        return
+
+    for paths in variants.values():
+        for path in paths.values():
+            default_storage.delete(path)
+
+
+def generate_variants(movie_id):
+    """
+    Build the resized WebP and JPEG copies of a movie poster and its inline
+    placeholder. Posters are keyed by a hash of their content, so saving a
+    movie with an unchanged poster does no work.
+    """
+    movie = Movie.objects.filter(pk=movie_id).only('photo', 'photo_hash', 'photo_variants').first()
+    if movie is None or not movie.photo:
+        return None
+
+    try:
+        with movie.photo.open('rb') as file:
+            photo_hash = get_hash(file)
+            if photo_hash == movie.photo_hash and movie.photo_variants:
+                return photo_hash
+
+            file.seek(0)
+            with Image.open(file) as image:
+                image = ImageOps.exif_transpose(image).convert('RGB')
+    except OSError:
+        # missing or unreadable upload
+        return None
+
+    variants = build_variants(image, photo_hash)
+    Movie.objects.filter(pk=movie_id).update(
+        photo_hash=photo_hash,
+        photo_variants=variants,
+        photo_placeholder=get_placeholder(image)
+    )
+
+    if movie.photo_hash != photo_hash:
+        delete_variants(movie.photo_hash, movie.photo_variants)
+
+    invalidate('movie')
+    return photo_hash
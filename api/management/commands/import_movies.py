@@ -0,0 +1,214 @@
+import csv
+import json
+from datetime import datetime
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+from api.cache import invalidate
+from api.models import (Genre, Country, Movie, MovieURL, AGE_LIMITS, LANGUAGE_CHOICES, TYPES_CHOICE,
+                        normalize_embed_url)
+from api.search import get_backend
+from api.tasks import generate_photo_variants
+
+LANGUAGES = {value for value, _ in LANGUAGE_CHOICES}
+AGES = {value for value, _ in AGE_LIMITS}
+TYPES = {value for value, _ in TYPES_CHOICE}
+
+
+def read_csv(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            if row.get('genres'):
+                row['genres'] = [slug.strip() for slug in row['genres'].split(',') if slug.strip()]
+            if row.get('video_items'):
+                row['video_items'] = json.loads(row['video_items'])
+            yield row
+
+
+def read_jsonl(path):
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+READERS = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+}
+
+
+class Command(BaseCommand):
+    help = ("Import movies from a CSV or JSONL file. Rows are streamed and written with "
+            "bulk_create in batches; genres and countries are resolved by slug.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=READERS, help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f"Unsupported format: {file_format}")
+
+        self.genres = dict(Genre.objects.values_list('slug', 'id'))
+        self.countries = dict(Country.objects.values_list('slug', 'id'))
+        self.created = self.skipped = 0
+
+        batch = []
+        for number, row in enumerate(READERS[file_format](path), start=1):
+            batch.append((number, row))
+            if len(batch) == options['batch_size']:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+
+        # bulk_create sends no signals
+        invalidate('movie', 'genre', 'country')
+
+        self.stdout.write(self.style.SUCCESS(f"Imported {self.created} movies, skipped {self.skipped}."))
+
+    def skip(self, number, reason):
+        self.skipped += 1
+        self.stderr.write(f"Row {number}: {reason}")
+
+    def get_related_id(self, cache, model, slug, name=None):
+        # raises IntegrityError when another row already has the name
+        if slug not in cache:
+            instance, _ = model.objects.get_or_create(slug=slug, defaults={
+                'name': name or slug.replace('-', ' ').title()
+            })
+            cache[slug] = instance.id
+        return cache[slug]
+
+    def resolve(self, row, movie):
+        # only for rows about to be created, and in one savepoint: a genre
+        # that fails rolls back the country created for the same row
+        genres = row.get('genres') or []
+        new = [(self.countries, row['country'])] if row['country'] not in self.countries else []
+        new += [(self.genres, slug) for slug in genres if slug not in self.genres]
+
+        try:
+            with transaction.atomic():
+                movie.country_id = self.get_related_id(
+                    self.countries, Country, row['country'], row.get('country_name')
+                )
+                return [self.get_related_id(self.genres, Genre, slug) for slug in genres]
+        except IntegrityError:
+            for cache, slug in new:
+                cache.pop(slug, None)
+            raise
+
+    def build(self, row):
+        title = (row.get('title') or '').strip()
+        if not title:
+            raise ValidationError("title is required")
+
+        language, age_limit = row.get('language'), row.get('age_limit')
+        if language not in LANGUAGES:
+            raise ValidationError(f"unknown language {language!r}")
+        if age_limit not in AGES:
+            raise ValidationError(f"unknown age_limit {age_limit!r}")
+
+        year = int(row.get('year') or datetime.now().year)
+        if not 1900 <= year <= datetime.now().year:
+            raise ValidationError(f"year {year} is out of range")
+
+        if not row.get('country') or not row.get('photo'):
+            raise ValidationError("country and photo are required")
+
+        movie = Movie(
+            title=title,
+            slug=row.get('slug') or slugify(title),
+            description=row.get('description') or None,
+            language=language,
+            year=year,
+            age_limit=age_limit,
+            photo=row['photo']
+        )
+        if row.get('duration'):
+            movie.duration = row['duration']
+
+        urls = []
+        for item in row.get('video_items') or []:
+            if item.get('type') not in TYPES:
+                raise ValidationError(f"unknown video type {item.get('type')!r}")
+
+            part = int(item['part']) if item.get('part') not in (None, '') else None
+            urls.append(MovieURL(
+                title=item.get('title') or title,
+                type=item['type'],
+                part=part,
+                embed_input=item['embed_input'],
+                embed_url=normalize_embed_url(item['type'], part, item['embed_input'])
+            ))
+
+        parts = [url.part for url in urls if url.part is not None]
+        if len(parts) != len(set(parts)):
+            raise ValidationError("duplicate series part")
+
+        # lowercase slugs only, "DRAMA" would create a second Drama genre
+        for slug in [movie.slug, row['country'], *(row.get('genres') or [])]:
+            if not isinstance(slug, str) or slugify(slug) != slug:
+                raise ValidationError(f"invalid slug {slug!r}")
+        return movie, urls
+
+    def generate_photos(self, movie_ids):
+        for movie_id in movie_ids:
+            generate_photo_variants.delay(movie_id)
+
+    def import_batch(self, batch):
+        slugs = {row.get('slug') or slugify(row.get('title') or '') for _, row in batch}
+        titles = {(row.get('title') or '').strip() for _, row in batch}
+        existing_slugs = set(Movie.objects.filter(slug__in=slugs).values_list('slug', flat=True))
+        existing_titles = set(Movie.objects.filter(title__in=titles).values_list('title', flat=True))
+
+        with transaction.atomic():
+            entries = []
+            for number, row in batch:
+                try:
+                    movie, urls = self.build(row)
+                except (ValidationError, ValueError, KeyError, TypeError) as e:
+                    self.skip(number, e)
+                    continue
+
+                if movie.slug in existing_slugs or movie.title in existing_titles:
+                    self.skip(number, f"movie {movie.slug!r} already exists")
+                    continue
+
+                try:
+                    genre_ids = self.resolve(row, movie)
+                except IntegrityError:
+                    self.skip(number, "a genre or country with that name already exists")
+                    continue
+
+                existing_slugs.add(movie.slug)
+                existing_titles.add(movie.title)
+                entries.append((movie, genre_ids, urls))
+
+            movies = Movie.objects.bulk_create([movie for movie, _, _ in entries])
+
+            Movie.genre.through.objects.bulk_create([
+                Movie.genre.through(movie_id=movie.id, genre_id=genre_id)
+                for movie, genre_ids, _ in entries for genre_id in set(genre_ids)
+            ])
+
+            urls = []
+            for movie, _, movie_urls in entries:
+                for url in movie_urls:
+                    url.movie_id = movie.id
+                    urls.append(url)
+            MovieURL.objects.bulk_create(urls)
+
+            movie_ids = [movie.id for movie in movies]
+            get_backend().index(movie_ids)
+            transaction.on_commit(lambda: self.generate_photos(movie_ids))
+
+        self.created += len(movies)
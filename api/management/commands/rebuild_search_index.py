@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the movie full-text search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        get_backend().rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api.similarity import rebuild_similar
+
+
+class Command(BaseCommand):
+    help = "Recompute the similar movies of every movie."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, help="Neighbours kept per movie.")
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        total = rebuild_similar(k=options['count'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Similar movies rebuilt for {total} movies."))
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movie',
+            index=models.Index(fields=['-created_at', '-id'], name='movie_created_at_id_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.1.15 on 2026-10-18 10:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def remove_duplicate_reactions(apps, schema_editor):
+    Movie = apps.get_model('api', 'Movie')
+    MovieReaction = apps.get_model('api', 'MovieReaction')
+
+    duplicates = (MovieReaction.objects
+                  .filter(user__isnull=False)
+                  .values('user', 'movie')
+                  .annotate(latest=Max('id'), total=Count('id'))
+                  .filter(total__gt=1))
+
+    for duplicate in duplicates.iterator():
+        MovieReaction.objects.filter(
+            user=duplicate['user'], movie=duplicate['movie']
+        ).exclude(id=duplicate['latest']).delete()
+
+    # the counters drifted together with the duplicates, rebuild them
+    def count(reaction):
+        reactions = (MovieReaction.objects
+                     .filter(movie=OuterRef('pk'), reaction=reaction)
+                     .values('movie')
+                     .annotate(total=Count('id'))
+                     .values('total'))
+        return Coalesce(Subquery(reactions, output_field=IntegerField()), Value(0))
+
+    Movie.objects.update(like=count('like'), dislike=count('dislike'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_movie_created_at_id_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='moviereaction',
+            constraint=models.UniqueConstraint(fields=('user', 'movie'), name='unique_user_movie_reaction'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.1.15 on 2026-10-18 11:20
+
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE api_movie_fts USING fts5(
+        title, description, genres, country,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    INSERT INTO api_movie_fts (rowid, title, description, genres, country)
+    SELECT m.id, m.title, COALESCE(m.description, ''),
+           COALESCE((SELECT group_concat(g.name, ' ') FROM api_movie_genre mg
+                     JOIN api_genre g ON g.id = mg.genre_id WHERE mg.movie_id = m.id), ''),
+           c.name
+    FROM api_movie m JOIN api_country c ON c.id = m.country_id
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE api_movie_fts",
+]
+
+POSTGRESQL_FORWARD = [
+    """
+    CREATE TABLE api_movie_search (
+        movie_id bigint PRIMARY KEY REFERENCES api_movie (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX api_movie_search_document_idx ON api_movie_search USING GIN (document)",
+    """
+    INSERT INTO api_movie_search (movie_id, document)
+    SELECT m.id,
+           setweight(to_tsvector('simple', m.title), 'A') ||
+           setweight(to_tsvector('simple', COALESCE(m.description, '')), 'D') ||
+           setweight(to_tsvector('simple', COALESCE((SELECT string_agg(g.name, ' ') FROM api_movie_genre mg
+                     JOIN api_genre g ON g.id = mg.genre_id WHERE mg.movie_id = m.id), '')), 'B') ||
+           setweight(to_tsvector('simple', c.name), 'C')
+    FROM api_movie m JOIN api_country c ON c.id = m.country_id
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP TABLE api_movie_search",
+]
+
+STATEMENTS = {
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+    'postgresql': (POSTGRESQL_FORWARD, POSTGRESQL_BACKWARD),
+}
+
+
+def run(direction):
+    def operation(apps, schema_editor):
+        statements = STATEMENTS.get(schema_editor.connection.vendor)
+        if statements:
+            for sql in statements[direction]:
+                schema_editor.execute(sql)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_moviereaction_unique_user_movie_reaction'),
+    ]
+
+    operations = [
+        migrations.RunPython(run(0), run(1)),
+    ]
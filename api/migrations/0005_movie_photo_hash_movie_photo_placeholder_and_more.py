@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_movie_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='movie',
+            name='photo_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64, verbose_name='Surat xeshi'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='photo_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Surat namunasi'),
+        ),
+        migrations.AddField(
+            model_name='movie',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name="Surat o'lchamlari"),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-18 15:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_movie_photo_hash_movie_photo_placeholder_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarMovie',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField(verbose_name="O'rni")),
+                ('score', models.FloatField(verbose_name="O'xshashligi")),
+                ('movie', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_movies', to='api.movie', verbose_name='Filmi')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_entries', to='api.movie', verbose_name="O'xshash filmi")),
+            ],
+            options={
+                'verbose_name': "O'xshash film ",
+                'verbose_name_plural': "O'xshash filmlar",
+                'constraints': [models.UniqueConstraint(fields=('movie', 'rank'), name='unique_movie_similar_rank')],
+            },
+        ),
+    ]
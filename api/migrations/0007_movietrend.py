@@ -0,0 +1,48 @@
+# Generated by Django 5.1.15 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_trends(apps, schema_editor):
+    # start from the current counters, only activity from now on is trending
+    Movie = apps.get_model('api', 'Movie')
+    MovieTrend = apps.get_model('api', 'MovieTrend')
+
+    now = timezone.now()
+    batch = []
+    for movie in Movie.objects.values('id', 'view', 'like', 'dislike').iterator(chunk_size=1000):
+        batch.append(MovieTrend(movie_id=movie['id'], view=movie['view'], like=movie['like'],
+                                dislike=movie['dislike'], updated_at=now))
+        if len(batch) == 1000:
+            MovieTrend.objects.bulk_create(batch)
+            batch = []
+    MovieTrend.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_similarmovie'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovieTrend',
+            fields=[
+                ('movie', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='api.movie', verbose_name='Filmi')),
+                ('score', models.FloatField(default=0, verbose_name='Reytingi')),
+                ('view', models.PositiveIntegerField(default=0, verbose_name="Ko'rishlar")),
+                ('like', models.PositiveIntegerField(default=0, verbose_name='Yoqtirishlar')),
+                ('dislike', models.PositiveIntegerField(default=0, verbose_name='Yoqtirmasliklar')),
+                ('updated_at', models.DateTimeField(verbose_name='Yangilangan vaqti')),
+            ],
+            options={
+                'verbose_name': 'Trend ',
+                'verbose_name_plural': 'Trendlar',
+                'indexes': [models.Index(fields=['-score', '-movie'], name='movie_trend_score_idx')],
+            },
+        ),
+        migrations.RunPython(seed_trends, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_movietrend'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movieurl',
+            index=models.Index(fields=['movie', 'type', 'part'], name='movie_url_movie_type_part_idx'),
+        ),
+    ]
@@ -68,9 +68,21 @@ class Movie(models.Model):
     view = models.PositiveIntegerField(default=0, validators=[MinValueValidator(0)], verbose_name="Ko'rishlar")
 
     photo = models.ImageField(upload_to='movies/', verbose_name="Surati")
+    photo_hash = models.CharField(max_length=64, blank=True, editable=False, db_index=True,
+                                  verbose_name="Surat xeshi")
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Surat o'lchamlari")
+    photo_placeholder = models.TextField(blank=True, editable=False, verbose_name="Surat namunasi")
     genre = models.ManyToManyField(Genre, related_name='movies', verbose_name="Janri")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Qo'shilgan vaqti")
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the slug as loaded, api.signals forgets its cached movie id on change
+        if 'slug' in field_names:
+            instance._loaded_slug = instance.slug
+        return instance
+
     def __str__(self):
         return self.title
 
@@ -79,6 +91,10 @@ class Movie(models.Model):
         verbose_name_plural = 'Filmlar'
         ordering = ['-created_at']
 
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='movie_created_at_id_idx')
+        ]
+
 
 TYPES_CHOICE = [
     ('trailer', "Treyler"),
@@ -87,6 +103,38 @@ TYPES_CHOICE = [
 ]
 
 
+def normalize_embed_url(type, part, embed_input):
+    value = embed_input.strip()
+
+    if type == "series":
+        if part is None:
+            raise ValidationError({
+                'part': "Serial uchun 'qism' majburiy."
+            })
+    else:
+        if part is not None:
+            raise ValidationError({
+                "part": "Faqat seriallar uchun 'qism' kiritiladi. Film yoki treyler uchun bo‘sh qoldiring."
+            })
+
+    if type != "trailer":
+        match = re.search(r'src=["\'](.*?)["\']', value)
+        if match:
+            value = match.group(1)
+
+        if not value.startswith('https://'):
+            raise ValidationError({
+                "embed_input": "URL manzili noto'g'ri kiritildi."
+            })
+    else:
+        if not value.startswith('https://'):
+            raise ValidationError({
+                "embed_input": "Treyler uchun to'g'ri URL kiriting, masalan: https://youtu.be/xyz"
+            })
+
+    return value
+
+
 class MovieURL(models.Model):
     title = models.CharField(max_length=150, verbose_name="Sarlavhasi")
     type = models.CharField(max_length=10, choices=TYPES_CHOICE, verbose_name="Turi")
@@ -110,35 +158,7 @@ class MovieURL(models.Model):
     movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='movie_url', verbose_name="FIlmi")
 
     def clean(self):
-        value = self.embed_input.strip()
-
-        if self.type == "series":
-            if self.part is None:
-                raise ValidationError({
-                    'part': "Serial uchun 'qism' majburiy."
-                })
-        else:
-            if self.part is not None:
-                raise ValidationError({
-                    "part": "Faqat seriallar uchun 'qism' kiritiladi. Film yoki treyler uchun bo‘sh qoldiring."
-                })
-
-        if self.type != "trailer":
-            match = re.search(r'src=["\'](.*?)["\']', value)
-            if match:
-                value = match.group(1)
-
-            if not value.startswith('https://'):
-                raise ValidationError({
-                    "embed_input": "URL manzili noto'g'ri kiritildi."
-                })
-        else:
-            if not value.startswith('https://'):
-                raise ValidationError({
-                    "embed_input": "Treyler uchun to'g'ri URL kiriting, masalan: https://youtu.be/xyz"
-                })
-
-        self.embed_url = value
+        self.embed_url = normalize_embed_url(self.type, self.part, self.embed_input)
 
     def __str__(self):
         return self.title
@@ -152,8 +172,53 @@ class MovieURL(models.Model):
             models.UniqueConstraint(fields=['movie', 'part'], name='unique_movie_part')
         ]
 
+        indexes = [
+            models.Index(fields=['movie', 'type', 'part'], name='movie_url_movie_type_part_idx')
+        ]
+
 
 class MovieReaction(models.Model):
     reaction = models.CharField(max_length=7)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
-    movie = models.ForeignKey(Movie, on_delete=models.CASCADE)
\ No newline at end of file
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'movie'], name='unique_user_movie_reaction')
+        ]
+
+
+class SimilarMovie(models.Model):
+    movie = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='similar_movies', verbose_name="Filmi")
+    similar = models.ForeignKey(Movie, on_delete=models.CASCADE, related_name='similar_entries',
+                                verbose_name="O'xshash filmi")
+    rank = models.PositiveSmallIntegerField(verbose_name="O'rni")
+    score = models.FloatField(verbose_name="O'xshashligi")
+
+    class Meta:
+        verbose_name = "O'xshash film "
+        verbose_name_plural = "O'xshash filmlar"
+
+        constraints = [
+            models.UniqueConstraint(fields=['movie', 'rank'], name='unique_movie_similar_rank')
+        ]
+
+
+class MovieTrend(models.Model):
+    movie = models.OneToOneField(Movie, on_delete=models.CASCADE, primary_key=True, related_name='trend',
+                                 verbose_name="Filmi")
+    score = models.FloatField(default=0, verbose_name="Reytingi")
+
+    # counters at the last update, the difference is the recent activity
+    view = models.PositiveIntegerField(default=0, verbose_name="Ko'rishlar")
+    like = models.PositiveIntegerField(default=0, verbose_name="Yoqtirishlar")
+    dislike = models.PositiveIntegerField(default=0, verbose_name="Yoqtirmasliklar")
+    updated_at = models.DateTimeField(verbose_name="Yangilangan vaqti")
+
+    class Meta:
+        verbose_name = 'Trend '
+        verbose_name_plural = 'Trendlar'
+
+        indexes = [
+            models.Index(fields=['-score', '-movie'], name='movie_trend_score_idx')
+        ]
@@ -1,16 +1,184 @@
-from rest_framework import status
-from rest_framework.pagination import PageNumberPagination
-from rest_framework.response import Response
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, _positive_int
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .responses import success_response
 
 
 class CustomPagination(PageNumberPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_paginated_response(self, data):
+        return success_response({
+            'total': self.page.paginator.count,
+            'results': data
+        })
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek pagination: the cursor holds the ordering values of the boundary row,
+    so every page is an index range read. The last ``ordering`` field must be
+    unique to act as a tiebreaker. NULLs in ``nullable_fields`` sort as the
+    smallest value, like in SQLite indexes.
+    """
+    ordering = ('-created_at', '-id')
+    nullable_fields = ()
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    # COUNT(*) is only run when the client asks for it
+    total_query_param = 'total'
+
+    invalid_cursor_message = "Invalid cursor."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        self.total = None
+        if request.query_params.get(self.total_query_param) in ('1', 'true'):
+            self.total = queryset.count()
+
+        ordering = self._reverse_ordering() if reverse else self.ordering
+        queryset = queryset.order_by(*self._order_by(ordering))
+
+        if position is not None:
+            queryset = queryset.filter(self._seek(ordering, position))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        return self.page
+
     def get_paginated_response(self, data):
+        return success_response({
+            'total': self.total,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data
+        })
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, separators=(',', ':'))
+        cursor = b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            payload = json.loads(b64decode(encoded.encode()).decode())
+            position, reverse = payload['p'], bool(payload['r'])
+
+            if not isinstance(position, list) or len(position) != len(self.ordering):
+                raise ValueError
+
+            position = [self._parse(model, field, value) for field, value in zip(self.ordering, position)]
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def _parse(self, model, field, value):
+        name = field.lstrip('-')
+        if value is None:
+            if name not in self.nullable_fields:
+                raise ValueError
+            return None
+        return model._meta.get_field(name).to_python(value)
+
+    def _position(self, instance):
+        position = []
+        for field in self.ordering:
+            value = getattr(instance, field.lstrip('-'))
+            position.append(value.isoformat() if isinstance(value, datetime) else value)
+        return position
+
+    def _reverse_ordering(self):
+        return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering)
+
+    def _order_by(self, ordering):
+        for field in ordering:
+            name = field.lstrip('-')
+            if name not in self.nullable_fields:
+                yield field
+            elif field.startswith('-'):
+                yield F(name).desc(nulls_last=True)
+            else:
+                yield F(name).asc(nulls_first=True)
+
+    def _seek(self, ordering, position):
+        seek = Q()
+        equal = Q()
+        for field, value in zip(ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-')
+
+            if value is None:
+                # nothing sorts below NULL
+                after = Q(pk__in=[]) if descending else Q(**{f'{name}__isnull': False})
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if descending and name in self.nullable_fields:
+                    after |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+
+            seek |= equal & after
+            equal &= same
+        return seek
+
+
+class MovieCursorPagination(KeysetPagination):
+    ordering = ('-created_at', '-id')
+
 
-        return Response({
-            'data': {
-                'total': self.page.paginator.count,
-                'results': data
-        },
-            'error': None,
-            'success': True,
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+class EpisodePagination(KeysetPagination):
+    # trailers and movies have no part and come first
+    ordering = ('part', 'id')
+    nullable_fields = ('part',)
@@ -0,0 +1,80 @@
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import Movie, MovieReaction
+
+LIKE = 'like'
+DISLIKE = 'dislike'
+
+MAX_ATTEMPTS = 5
+
+
+class ReactionConflict(Exception):
+    pass
+
+
+def _toggle(movie_id, user, reaction):
+    reactions = MovieReaction.objects.filter(movie_id=movie_id, user=user)
+    current = reactions.values_list('reaction', flat=True).first()
+
+    if current is None:
+        with transaction.atomic():
+            MovieReaction.objects.create(movie_id=movie_id, user=user, reaction=reaction)
+        return {reaction: 1}
+
+    # Every change is conditional on the state read above; if a concurrent
+    # request got there first nothing matches and the whole toggle is retried.
+    if current == reaction:
+        deleted, _ = reactions.filter(reaction=current).delete()
+        if not deleted:
+            raise ReactionConflict
+        return {reaction: -1}
+
+    if not reactions.filter(reaction=current).update(reaction=reaction):
+        raise ReactionConflict
+    return {reaction: 1, current: -1}
+
+
+def _apply(movie_id, deltas):
+    like, dislike = deltas.get(LIKE, 0), deltas.get(DISLIKE, 0)
+
+    if not connection.features.can_return_columns_from_insert:
+        Movie.objects.filter(pk=movie_id).update(**{
+            field: F(field) + delta for field, delta in ((LIKE, like), (DISLIKE, dislike)) if delta
+        })
+        return Movie.objects.filter(pk=movie_id).values(LIKE, DISLIKE).first()
+
+    qn = connection.ops.quote_name
+    table, like_column, dislike_column = qn(Movie._meta.db_table), qn('like'), qn('dislike')
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET "
+            f"{like_column} = CASE WHEN {like_column} + %s > 0 THEN {like_column} + %s ELSE 0 END, "
+            f"{dislike_column} = CASE WHEN {dislike_column} + %s > 0 THEN {dislike_column} + %s ELSE 0 END "
+            f"WHERE {qn('id')} = %s RETURNING {like_column}, {dislike_column}",
+            [like, like, dislike, dislike, movie_id]
+        )
+        row = cursor.fetchone()
+
+    return {LIKE: row[0], DISLIKE: row[1]} if row else None
+
+
+def react(movie_id, user, reaction):
+    """
+    Toggle ``user``'s ``reaction`` on a movie and return its fresh like and
+    dislike counts, or ``None`` if the movie does not exist.
+    """
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                return _apply(movie_id, _toggle(movie_id, user, reaction))
+        except IntegrityError:
+            # the reaction's foreign key fails when the movie was deleted
+            if not Movie.objects.filter(pk=movie_id).exists():
+                return None
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
+        except ReactionConflict:
+            if attempt == MAX_ATTEMPTS - 1:
+                raise
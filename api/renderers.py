@@ -0,0 +1,23 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# values orjson does not know natively (lazy translations, Decimal, ...) are
+# converted the same way DRF's encoder does
+_default = JSONEncoder().default
+
+
+def dumps(data):
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    JSON renderer on top of orjson. Output is always compact UTF-8, the
+    ``indent`` media type parameter is ignored.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
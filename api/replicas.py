@@ -0,0 +1,108 @@
+import itertools
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.deprecation import MiddlewareMixin
+from rest_framework.permissions import SAFE_METHODS
+
+
+@dataclass
+class State:
+    replica: str = None
+    pinned: bool = False
+
+
+# set by ReplicaMiddleware for the current request, reads outside requests
+# (tasks, management commands) always go to the primary
+_state = ContextVar('replica_state', default=None)
+
+_counter = itertools.count()
+# alias -> time until which a failing replica is skipped
+_down = {}
+
+
+def get_replica():
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return None
+
+    start = next(_counter)
+    for offset in range(len(replicas)):
+        alias = replicas[(start + offset) % len(replicas)]
+        if _down.get(alias, 0) > time.monotonic():
+            continue
+
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            _down[alias] = time.monotonic() + settings.DATABASE_REPLICA_RETRY
+            continue
+        return alias
+
+    return None
+
+
+def use_primary():
+    # the rest of the current request reads from the primary
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+class ReplicaRouter:
+    """
+    Route reads of safe-method requests to the replica chosen by
+    ReplicaMiddleware. Writes always go to the primary and pin the rest of
+    the request to it, so a request reads its own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned or state.replica is None:
+            return None
+
+        # reads inside a transaction (select_for_update included) belong to it
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware(MiddlewareMixin):
+    def process_request(self, request):
+        _state.set(State(pinned=request.method not in SAFE_METHODS))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if state is None or state.pinned:
+            return
+
+        view = getattr(view_func, 'cls', None)
+        # @action(read_primary=True) overrides the viewset's attribute
+        if getattr(view_func, 'initkwargs', {}).get('read_primary', getattr(view, 'read_primary', False)):
+            state.pinned = True
+        else:
+            state.replica = get_replica()
+
+    def process_response(self, request, response):
+        # not reset(), under ASGI each hook runs in a copy of the context
+        _state.set(None)
+        return response
@@ -0,0 +1,22 @@
+from rest_framework import status as statuses
+from rest_framework.response import Response
+
+
+def envelope(data=None, error=None):
+    return {
+        'data': data,
+        'error': error,
+        'success': error is None
+    }
+
+
+def success_response(data=None, status=statuses.HTTP_200_OK, **kwargs):
+    return Response(envelope(data), status=status, **kwargs)
+
+
+def error_response(status, message, friendly=True, **kwargs):
+    return Response(envelope(error={
+        'errorId': status,
+        'isFriendly': friendly,
+        'errorMsg': message
+    }), status=status, **kwargs)
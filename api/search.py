@@ -0,0 +1,170 @@
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Movie
+
+SQLITE_TABLE = 'api_movie_fts'
+POSTGRESQL_TABLE = 'api_movie_search'
+
+# relative weight of the title, description, genre and country columns
+WEIGHTS = (10.0, 1.0, 4.0, 2.0)
+
+
+def get_terms(query):
+    return re.findall(r'\w+', query)[:settings.MOVIE_SEARCH_MAX_TERMS]
+
+
+def get_documents(movie_ids):
+    movies = Movie.objects.filter(id__in=movie_ids).select_related('country').prefetch_related('genre')
+    for movie in movies:
+        yield (
+            movie.id,
+            movie.title,
+            movie.description or '',
+            ' '.join(genre.name for genre in movie.genre.all()),
+            movie.country.name
+        )
+
+
+class BaseSearchBackend:
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def index(self, movie_ids):
+        pass
+
+    def remove(self, movie_ids):
+        pass
+
+    def rebuild(self, batch_size=1000):
+        movie_ids = Movie.objects.order_by('id').values_list('id', flat=True)
+        batch = []
+        for movie_id in movie_ids.iterator(chunk_size=batch_size):
+            batch.append(movie_id)
+            if len(batch) == batch_size:
+                self.index(batch)
+                batch = []
+        if batch:
+            self.index(batch)
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Unindexed ``icontains`` fallback for databases without full-text search."""
+
+    def search(self, queryset, query):
+        condition = Q()
+        for term in get_terms(query):
+            condition &= (Q(title__icontains=term) | Q(description__icontains=term)
+                          | Q(genre__name__icontains=term) | Q(country__name__icontains=term))
+        return queryset.filter(id__in=Movie.objects.filter(condition).values('id'))
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 index ranked with bm25, the rowid of every entry is the movie id."""
+
+    def _match(self, query):
+        return ' '.join(f'"{term}"*' for term in get_terms(query))
+
+    def search(self, queryset, query):
+        match = self._match(query)
+        if not match:
+            return queryset.none()
+
+        table = connection.ops.quote_name(Movie._meta.db_table)
+        weights = ', '.join(str(weight) for weight in WEIGHTS)
+
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {SQLITE_TABLE} WHERE {SQLITE_TABLE} MATCH %s', (match,))
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT bm25({SQLITE_TABLE}, {weights}) FROM {SQLITE_TABLE} '
+                f'WHERE {SQLITE_TABLE} MATCH %s AND rowid = {table}.id',
+                (match,)
+            )
+        ).order_by('search_rank', '-id')
+
+    def index(self, movie_ids):
+        documents = list(get_documents(movie_ids))
+        with connection.cursor() as cursor:
+            self._delete(cursor, movie_ids)
+            cursor.executemany(
+                f'INSERT INTO {SQLITE_TABLE} (rowid, title, description, genres, country) VALUES (%s, %s, %s, %s, %s)',
+                documents
+            )
+
+    def remove(self, movie_ids):
+        with connection.cursor() as cursor:
+            self._delete(cursor, movie_ids)
+
+    def _delete(self, cursor, movie_ids):
+        movie_ids = list(movie_ids)
+        if movie_ids:
+            placeholders = ', '.join(['%s'] * len(movie_ids))
+            cursor.execute(f'DELETE FROM {SQLITE_TABLE} WHERE rowid IN ({placeholders})', movie_ids)
+
+
+class PostgreSQLSearchBackend(BaseSearchBackend):
+    """Weighted ``tsvector`` per movie in a GIN indexed table, ranked with ts_rank."""
+
+    config = 'simple'
+
+    # {D, C, B, A}: description, country, genres, title
+    weights = '{0.1, 0.2, 0.4, 1.0}'
+
+    def _query(self, query):
+        return ' & '.join(f'{term}:*' for term in get_terms(query))
+
+    def search(self, queryset, query):
+        tsquery = self._query(query)
+        if not tsquery:
+            return queryset.none()
+
+        table = connection.ops.quote_name(Movie._meta.db_table)
+
+        return queryset.filter(
+            id__in=RawSQL(
+                f'SELECT movie_id FROM {POSTGRESQL_TABLE} WHERE document @@ to_tsquery(%s, %s)',
+                (self.config, tsquery)
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f'SELECT ts_rank(%s::float4[], document, to_tsquery(%s, %s)) FROM {POSTGRESQL_TABLE} '
+                f'WHERE movie_id = {table}.id',
+                (self.weights, self.config, tsquery)
+            )
+        ).order_by('-search_rank', '-id')
+
+    def index(self, movie_ids):
+        documents = [
+            (movie_id, self.config, title, self.config, description, self.config, genres, self.config, country)
+            for movie_id, title, description, genres, country in get_documents(movie_ids)
+        ]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {POSTGRESQL_TABLE} (movie_id, document) VALUES (%s, "
+                f"setweight(to_tsvector(%s, %s), 'A') || setweight(to_tsvector(%s, %s), 'D') || "
+                f"setweight(to_tsvector(%s, %s), 'B') || setweight(to_tsvector(%s, %s), 'C')) "
+                f"ON CONFLICT (movie_id) DO UPDATE SET document = EXCLUDED.document",
+                documents
+            )
+
+    def remove(self, movie_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {POSTGRESQL_TABLE} WHERE movie_id = ANY(%s)', (list(movie_ids),))
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgreSQLSearchBackend,
+}
+
+
+def get_backend():
+    if settings.MOVIE_SEARCH_BACKEND:
+        return import_string(settings.MOVIE_SEARCH_BACKEND)()
+    return BACKENDS.get(connection.vendor, SimpleSearchBackend)()
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.core.files.storage import default_storage
 from django.utils.text import slugify
 
 from .models import Genre, Country, Movie, MovieURL
@@ -46,10 +47,36 @@ class MovieURLSerializer(serializers.ModelSerializer):
         fields = ['title', 'type', 'part', 'embed_url']
 
 
+EXPANDABLE_FIELDS = ('country', 'genre', 'video_items')
+
+
+def get_field_selection(params, default_expand=EXPANDABLE_FIELDS):
+    """
+    Parse ``?fields=`` and ``?expand=`` into the requested field names, or
+    ``None`` for all of them, and the relations to nest. Without ``expand``
+    the ``default_expand`` relations are nested.
+    """
+    fields = params.get('fields')
+    fields = {name.strip() for name in fields.split(',') if name.strip()} if fields else None
+
+    expand = params.get('expand')
+    if expand is None:
+        expand = set(default_expand)
+    else:
+        expand = {name.strip() for name in expand.split(',')} & set(EXPANDABLE_FIELDS)
+
+    if fields is not None:
+        expand &= fields
+
+    return fields, expand
+
+
 class MovieSerializer(serializers.ModelSerializer):
+    photo_variants = serializers.SerializerMethodField()
+
     class Meta:
         model = Movie
-        fields = '__all__'
+        exclude = ['photo_hash']
         read_only_fields = ['id', 'like', 'dislike', 'view']
         extra_kwargs = {
             'slug': {
@@ -58,16 +85,44 @@ class MovieSerializer(serializers.ModelSerializer):
             }
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # set by the viewset for read requests, see get_field_selection
+        self.requested_fields, self.expand = self.context.get('field_selection', (None, set(EXPANDABLE_FIELDS)))
+        if self.requested_fields is not None:
+            for name in set(self.fields) - self.requested_fields:
+                self.fields.pop(name)
+
     def validate(self, attrs):
         if not attrs.get('slug'):
             attrs['slug'] = slugify(attrs['title'])
         return attrs
 
+    def get_photo_variants(self, instance):
+        request = self.context.get('request')
+        variants = {}
+        for name, paths in instance.photo_variants.items():
+            variants[name] = {}
+            for width, path in paths.items():
+                url = default_storage.url(path)
+                variants[name][width] = request.build_absolute_uri(url) if request else url
+        return variants
+
     def to_representation(self, instance):
         data = super().to_representation(instance)
 
-        data['country'] = CountrySerializer(instance.country).data
-        data['genre'] = GenreSerializer(instance.genre.all(), many=True).data
-        data['video_items'] = MovieURLSerializer(instance.movie_url.all(), many=True).data
+        if 'country' in self.expand:
+            data['country'] = CountrySerializer(instance.country).data
+        if 'genre' in self.expand:
+            data['genre'] = GenreSerializer(instance.genre.all(), many=True).data
+        if 'video_items' in self.expand:
+            data['video_items'] = MovieURLSerializer(instance.movie_url.all(), many=True).data
+
+        # list querysets carry a summary instead, see MovieViewSet.get_queryset
+        if hasattr(instance, 'episode_count'):
+            data['episode_count'] = instance.episode_count
+        if hasattr(instance, 'trailers'):
+            data['trailer'] = MovieURLSerializer(instance.trailers[0]).data if instance.trailers else None
 
         return data
\ No newline at end of file
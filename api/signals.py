@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+
+from .cache import invalidate
+from .counters import forget_slugs
+from .images import delete_variants
+from .models import Genre, Country, Movie, MovieURL
+from .search import get_backend
+from .tasks import generate_photo_variants
+
+
+@receiver([post_save, post_delete], sender=Movie)
+@receiver([post_save, post_delete], sender=MovieURL)
+def movie_cache_signal(sender, **kwargs):
+    invalidate('movie')
+
+
+@receiver(m2m_changed, sender=Movie.genre.through)
+def movie_genre_cache_signal(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate('movie')
+
+
+@receiver([post_save, post_delete], sender=Genre)
+def genre_cache_signal(sender, **kwargs):
+    invalidate('genre')
+
+
+@receiver([post_save, post_delete], sender=Country)
+def country_cache_signal(sender, **kwargs):
+    invalidate('country')
+
+
+def forget_movie_slugs(instance):
+    # the new slug may still map to the movie that held it before. Forget
+    # again on commit, a request may have cached the old row meanwhile.
+    slugs = {getattr(instance, '_loaded_slug', None), instance.slug}
+    forget_slugs(slugs)
+    transaction.on_commit(lambda: forget_slugs(slugs))
+
+
+@receiver(pre_save, sender=Movie)
+def movie_loaded_slug_signal(sender, instance, raw=False, **kwargs):
+    # instances not loaded through from_db (copies, deserialized objects)
+    if raw or instance.pk is None or hasattr(instance, '_loaded_slug'):
+        return
+    instance._loaded_slug = sender.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Movie)
+def movie_slug_signal(sender, instance, **kwargs):
+    forget_movie_slugs(instance)
+    instance._loaded_slug = instance.slug
+
+
+@receiver(post_delete, sender=Movie)
+def movie_slug_delete_signal(sender, instance, **kwargs):
+    forget_movie_slugs(instance)
+
+
+def reindex(movie_ids):
+    movie_ids = list(movie_ids)
+    if movie_ids:
+        transaction.on_commit(lambda: get_backend().index(movie_ids))
+
+
+@receiver(post_save, sender=Movie)
+def movie_search_signal(sender, instance, **kwargs):
+    reindex([instance.id])
+
+
+@receiver(post_delete, sender=Movie)
+def movie_search_delete_signal(sender, instance, **kwargs):
+    movie_id = instance.id
+    transaction.on_commit(lambda: get_backend().remove([movie_id]))
+
+
+@receiver(m2m_changed, sender=Movie.genre.through)
+def movie_genre_search_signal(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        reindex([instance.id])
+    elif action == 'pre_clear':
+        reindex(instance.movies.values_list('id', flat=True))
+    else:
+        reindex(pk_set)
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Country)
+def genre_country_search_signal(sender, instance, created, **kwargs):
+    if not created:
+        reindex(instance.movies.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Genre)
+def genre_search_delete_signal(sender, instance, **kwargs):
+    reindex(instance.movies.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Movie)
+def movie_photo_signal(sender, instance, update_fields, **kwargs):
+    if update_fields is not None and 'photo' not in update_fields:
+        return
+
+    # the task compares content hashes, so re-saving the same poster is a no-op
+    movie_id = instance.id
+    transaction.on_commit(lambda: generate_photo_variants.delay(movie_id))
+
+
+@receiver(post_delete, sender=Movie)
+def movie_photo_delete_signal(sender, instance, **kwargs):
+    # the original upload is removed by django_cleanup
+    photo_hash, variants = instance.photo_hash, instance.photo_variants
+    transaction.on_commit(lambda: delete_variants(photo_hash, variants))
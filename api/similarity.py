@@ -0,0 +1,104 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from scipy import sparse
+
+from .cache import invalidate
+from .models import Movie, SimilarMovie
+
+# relative weight of each feature group in the cosine similarity
+WEIGHTS = {
+    'genre': 1.0,
+    'country': 0.6,
+    'language': 0.4,
+    'age_limit': 0.3,
+    'year': 0.3,
+}
+
+YEAR_BUCKET = 10
+
+
+def build_matrix(chunk_size=2000):
+    """
+    Return the sorted movie ids and a row normalised sparse movie × feature
+    matrix in the same order.
+    """
+    columns = {}
+    ids, rows, cols, data = [], [], [], []
+
+    def add(row, group, value):
+        rows.append(row)
+        cols.append(columns.setdefault((group, value), len(columns)))
+        data.append(WEIGHTS[group])
+
+    movies = Movie.objects.order_by('id').values_list('id', 'country_id', 'language', 'age_limit', 'year')
+    for row, (movie_id, country_id, language, age_limit, year) in enumerate(movies.iterator(chunk_size=chunk_size)):
+        ids.append(movie_id)
+        add(row, 'country', country_id)
+        add(row, 'language', language)
+        add(row, 'age_limit', age_limit)
+        add(row, 'year', year // YEAR_BUCKET)
+
+    ids = np.array(ids, dtype=np.int64)
+
+    genres = Movie.genre.through.objects.values_list('movie_id', 'genre_id')
+    for movie_id, genre_id in genres.iterator(chunk_size=chunk_size):
+        row = np.searchsorted(ids, movie_id)
+        # the movie was created after the id list was read
+        if row < len(ids) and ids[row] == movie_id:
+            add(int(row), 'genre', genre_id)
+
+    matrix = sparse.csr_matrix((np.array(data, dtype=np.float32), (rows, cols)),
+                               shape=(len(ids), len(columns)), dtype=np.float32)
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return ids, sparse.diags(1 / norms).astype(np.float32) @ matrix
+
+
+def get_neighbours(matrix, k, batch_size):
+    """
+    Yield ``(start, indices, scores)`` with the ``k`` most similar rows for
+    each batch of rows, best first. Only a ``batch_size`` × movies block of
+    scores is held in memory at a time.
+    """
+    total = matrix.shape[0]
+    k = min(k, total - 1)
+
+    for start in range(0, total, batch_size):
+        stop = min(start + batch_size, total)
+        if k <= 0:
+            yield start, np.empty((stop - start, 0), dtype=np.int64), np.empty((stop - start, 0))
+            continue
+
+        scores = (matrix @ matrix[start:stop].T.toarray()).T
+        scores[np.arange(stop - start), np.arange(start, stop)] = -1
+
+        indices = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(scores, indices, axis=1)
+        order = np.argsort(-top, axis=1, kind='stable')
+
+        yield start, np.take_along_axis(indices, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+
+def rebuild_similar(k=None, batch_size=None):
+    k = k or settings.MOVIE_SIMILAR_COUNT
+    batch_size = batch_size or settings.MOVIE_SIMILAR_BATCH_SIZE
+
+    ids, matrix = build_matrix()
+
+    for start, indices, scores in get_neighbours(matrix, k, batch_size):
+        movie_ids = ids[start:start + len(indices)]
+        entries = [
+            SimilarMovie(movie_id=int(movie_id), similar_id=int(ids[index]), rank=rank, score=float(score))
+            for movie_id, row, row_scores in zip(movie_ids, indices, scores)
+            for rank, (index, score) in enumerate(zip(row, row_scores), start=1)
+            if score > 0
+        ]
+
+        with transaction.atomic():
+            SimilarMovie.objects.filter(movie_id__in=movie_ids.tolist()).delete()
+            SimilarMovie.objects.bulk_create(entries)
+
+    invalidate('movie')
+    return len(ids)
@@ -0,0 +1,26 @@
+from celery import shared_task
+
+from .counters import flush_views
+from .images import generate_variants
+from .similarity import rebuild_similar
+from .trending import update_trending
+
+
+@shared_task
+def flush_movie_views():
+    return flush_views()
+
+
+@shared_task
+def generate_photo_variants(movie_id):
+    return generate_variants(movie_id)
+
+
+@shared_task
+def rebuild_similar_movies():
+    return rebuild_similar()
+
+
+@shared_task
+def update_trending_movies():
+    return update_trending()
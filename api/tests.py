@@ -1,3 +1,1193 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import tempfile
+from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+import brotli
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import AccessToken
+
+from movie.celery import app as celery_app
+
+from .cache import BUMPED_KEY, LOCK_KEY
+from .checks import check_shared_caches
+from .counters import flush_views, record_view
+from .images import VARIANT_PATH
+from .models import Genre, Country, Movie, MovieURL, MovieReaction, MovieTrend, SimilarMovie
+from .reactions import LIKE, DISLIKE, react
+from .renderers import ORJSONRenderer
+from .replicas import ReplicaMiddleware, _down
+from .similarity import rebuild_similar
+from .throttling import SlidingWindowThrottle
+from .urls import async_urlpatterns
+from .trending import update_trending
+from .views import GenreViewSet
+
+
+def create_movies(count, genres, country):
+    movies = Movie.objects.bulk_create([
+        Movie(
+            title=f"Film {i}",
+            slug=f"film-{i}",
+            country=country,
+            language="Rus tilida",
+            year=2020,
+            age_limit="12+",
+            photo="movies/poster.jpg"
+        ) for i in range(count)
+    ])
+
+    Movie.genre.through.objects.bulk_create([
+        Movie.genre.through(movie_id=movie.id, genre_id=genre.id)
+        for movie in movies for genre in genres
+    ])
+    MovieURL.objects.bulk_create([
+        MovieURL(
+            title=f"{movie.title} treyler",
+            type="trailer",
+            embed_input="https://youtu.be/abc",
+            embed_url="https://youtu.be/abc",
+            movie=movie
+        ) for movie in movies
+    ])
+
+    return movies
+
+
+def run_tasks_eagerly(testcase):
+    # saving a movie queues its poster variants, run them in-process
+    eager = {
+        'CELERY_TASK_ALWAYS_EAGER': True,
+        'CELERY_BROKER_URL': 'memory://',
+        'CELERY_RESULT_BACKEND': 'cache+memory://'
+    }
+    previous = {key: celery_app.conf.get(key) for key in eager}
+    celery_app.conf.update(eager)
+    testcase.addCleanup(celery_app.conf.update, previous)
+
+
+class MovieQueryCountTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.genres = [
+            Genre.objects.create(name="Drama", slug="drama"),
+            Genre.objects.create(name="Komediya", slug="komediya")
+        ]
+        cls.country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movies = create_movies(100, cls.genres, cls.country)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_query_count_is_constant(self):
+        for page_size in (10, 50, 100):
+            with self.subTest(page_size=page_size):
+                # count, movies joined with country, genres, trailers
+                with self.assertNumQueries(4):
+                    response = self.client.get('/api/v1/movie/', {'page_size': page_size})
+
+                self.assertEqual(response.status_code, 200)
+
+                results = response.json()['data']['results']
+                self.assertEqual(len(results), page_size)
+                self.assertEqual(len(results[0]['genre']), 2)
+                self.assertEqual(results[0]['country']['slug'], 'fransiya')
+                self.assertEqual(results[0]['episode_count'], 1)
+                self.assertEqual(results[0]['trailer']['type'], 'trailer')
+                self.assertNotIn('video_items', results[0])
+
+    def test_retrieve_query_count(self):
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/v1/movie/{self.movies[0].slug}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['country']['name'], 'Fransiya')
+
+    def test_sparse_fields_skip_columns_and_relations(self):
+        # count and movies, nothing else is joined or prefetched
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/v1/movie/', {'fields': 'title,slug,year'})
+
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('description', queries[1]['sql'])
+        self.assertEqual(response.json()['data']['results'][0], {'title': 'Film 99', 'slug': 'film-99', 'year': 2020})
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/v1/movie/', {'fields': 'slug', 'pagination': 'cursor'})
+        self.assertIsNotNone(response.json()['data']['next'])
+
+    def test_expand_selected_relations(self):
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/v1/movie/', {'fields': 'slug,country,genre', 'expand': 'country'})
+
+        movie = response.json()['data']['results'][0]
+        self.assertEqual(movie['country']['slug'], 'fransiya')
+        self.assertEqual(movie['genre'], [genre.id for genre in self.genres])
+        self.assertNotIn('video_items', movie)
+
+        movie = self.client.get(f'/api/v1/movie/{self.movies[0].slug}/', {'expand': 'video_items'}).json()['data']
+        self.assertEqual(movie['country'], self.country.id)
+        self.assertEqual(len(movie['video_items']), 1)
+        self.assertIn('description', movie)
+
+
+class EpisodesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movie, = create_movies(1, [], country)
+        MovieURL.objects.bulk_create([
+            MovieURL(title=f"{part}-qism", type="series", part=part, embed_input="https://mover.uz/video/embed/x",
+                     embed_url="https://mover.uz/video/embed/x", movie=cls.movie)
+            for part in range(5, 0, -1)
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        data = response.json()['data']
+        return [(item['type'], item['part']) for item in data['results']], data['next'], data['previous']
+
+    def test_keyset_pages_by_part(self):
+        url = f'/api/v1/movie/{self.movie.slug}/episodes/'
+
+        items, next_url, previous_url = self.get(url, page_size=2)
+        self.assertEqual(items, [('trailer', None), ('series', 1)])
+        self.assertIsNone(previous_url)
+
+        items, next_url, previous_url = self.get(next_url)
+        self.assertEqual(items, [('series', 2), ('series', 3)])
+
+        self.assertEqual(self.get(previous_url)[0], [('trailer', None), ('series', 1)])
+        self.assertEqual(self.get(next_url)[0], [('series', 4), ('series', 5)])
+
+    def test_filter_by_type(self):
+        url = f'/api/v1/movie/{self.movie.slug}/episodes/'
+
+        items, next_url, _ = self.get(url, type='series', page_size=3)
+        self.assertEqual(items, [('series', 1), ('series', 2), ('series', 3)])
+        self.assertEqual(self.get(next_url)[0], [('series', 4), ('series', 5)])
+
+        self.assertEqual(self.client.get(url, {'type': 'klip'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/v1/movie/yoq/episodes/').status_code, 404)
+
+    def test_list_carries_episode_count(self):
+        movie = self.client.get('/api/v1/movie/').json()['data']['results'][0]
+        self.assertEqual((movie['episode_count'], movie['trailer']['title']), (6, 'Film 0 treyler'))
+
+        movie = self.client.get('/api/v1/movie/', {'expand': 'video_items'}).json()['data']['results'][0]
+        self.assertEqual(len(movie['video_items']), 6)
+        self.assertNotIn('episode_count', movie)
+
+
+class MovieCursorPaginationTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        genre = Genre.objects.create(name="Drama", slug="drama")
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movies = create_movies(25, [genre], country)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_walks_every_movie_once(self):
+        url = '/api/v1/movie/?pagination=cursor&page_size=10'
+        seen = []
+
+        while url:
+            # movies joined with country, genres, video items; no COUNT(*)
+            with self.assertNumQueries(3):
+                body = self.client.get(url).json()
+
+            self.assertTrue(body['success'])
+            self.assertIsNone(body['data']['total'])
+            seen.extend(movie['id'] for movie in body['data']['results'])
+            url = body['data']['next']
+
+        expected = Movie.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_previous_link_returns_preceding_page(self):
+        first = self.client.get('/api/v1/movie/', {'pagination': 'cursor', 'page_size': 10}).json()
+        second = self.client.get(first['data']['next']).json()
+        previous = self.client.get(second['data']['previous']).json()
+
+        self.assertEqual(previous['data']['results'], first['data']['results'])
+        self.assertIsNone(first['data']['previous'])
+
+    def test_total_is_opt_in(self):
+        body = self.client.get('/api/v1/movie/', {'pagination': 'cursor', 'total': 'true'}).json()
+        self.assertEqual(body['data']['total'], 25)
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', {'p': ['abc', 1], 'r': 0}, {'p': [None, 1], 'r': 0}, {'p': [[], {}], 'r': 0}):
+            if not isinstance(cursor, str):
+                cursor = b64encode(json.dumps(cursor).encode()).decode()
+
+            with self.subTest(cursor=cursor):
+                response = self.client.get('/api/v1/movie/', {'pagination': 'cursor', 'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
+
+
+class ResponseCacheTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.genre = Genre.objects.create(name="Drama", slug="drama")
+        cls.country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movies = create_movies(3, [cls.genre], cls.country)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get('/api/v1/movie/')
+        self.assertEqual(first['X-Cache'], 'MISS')
+
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/v1/movie/')
+
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+
+    def test_query_string_order_does_not_matter(self):
+        self.client.get('/api/v1/movie/', {'genre': 'drama', 'year': 2020})
+        response = self.client.get('/api/v1/movie/?year=2020&genre=drama')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_host_and_scheme_are_part_of_the_key(self):
+        self.client.get('/api/v1/movie/', HTTP_HOST='a.example.com')
+
+        response = self.client.get('/api/v1/movie/', HTTP_HOST='b.example.com')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('http://b.example.com/', response.json()['data']['results'][0]['photo'])
+
+        response = self.client.get('/api/v1/movie/', HTTP_HOST='a.example.com', secure=True)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('https://a.example.com/', response.json()['data']['results'][0]['photo'])
+
+    def test_genre_change_invalidates_genre_and_movie_responses(self):
+        self.client.get('/api/v1/movie/')
+        self.client.get('/api/v1/genre/')
+        self.client.get('/api/v1/country/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.genre.name = "Melodrama"
+            self.genre.save()
+
+        response = self.client.get('/api/v1/movie/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['data']['results'][0]['genre'][0]['name'], 'Melodrama')
+        self.assertEqual(self.client.get('/api/v1/genre/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/v1/country/')['X-Cache'], 'HIT')
+
+    def test_genre_m2m_change_invalidates_movie_responses(self):
+        url = f'/api/v1/movie/{self.movies[0].slug}/'
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.movies[0].genre.clear()
+
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['data']['genre'], [])
+
+    @mock.patch('api.cache.get_cache_key', return_value='countries')
+    def test_stale_entry_is_served_while_another_request_refreshes(self, get_cache_key):
+        self.client.get('/api/v1/country/')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Country.objects.create(name="Italiya", slug="italiya")
+
+        cache.add(LOCK_KEY.format('countries'), 1)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/country/')
+
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertEqual(response.json()['data']['total'], 1)
+
+        cache.delete(LOCK_KEY.format('countries'))
+        response = self.client.get('/api/v1/country/')
+
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['data']['total'], 2)
+
+
+class CompressionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        create_movies(20, [], country)
+        cls.admin = User.objects.create_user(username="admin", password="secret-pass-123", is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_negotiated_encoding(self):
+        plain = self.client.get('/api/v1/movie/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+        response = self.client.get('/api/v1/movie/', HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+
+        response = self.client.get('/api/v1/movie/', HTTP_ACCEPT_ENCODING='br;q=0.5, gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+        response = self.client.get('/api/v1/country/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_cache_entries_are_compressed_once(self):
+        with mock.patch('gzip.compress', wraps=gzip.compress) as compress:
+            first = self.client.get('/api/v1/movie/', HTTP_ACCEPT_ENCODING='gzip')
+            second = self.client.get('/api/v1/movie/', HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(compress.call_count, 1)
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second['Content-Encoding'], 'gzip')
+        self.assertEqual(second.content, first.content)
+
+    def test_export_override(self):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.admin)}'}
+
+        response = self.client.get('/api/v1/movie/export/', HTTP_ACCEPT_ENCODING='br, gzip', **headers)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(len(gzip.decompress(b''.join(response.streaming_content)).splitlines()), 20)
+
+        response = self.client.get('/api/v1/movie/export/', HTTP_ACCEPT_ENCODING='br', **headers)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+@override_settings(API_COUNTER_CACHE_ALIAS='default')
+class ViewCounterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        genre = Genre.objects.create(name="Drama", slug="drama")
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movies = create_movies(3, [genre], country)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_view_endpoint_does_not_write_to_database(self):
+        url = f'/api/v1/movie/{self.movies[0].slug}/view/'
+        self.client.get(url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Movie.objects.get(pk=self.movies[0].pk).view, 0)
+
+        flush_views()
+        self.assertEqual(Movie.objects.get(pk=self.movies[0].pk).view, 2)
+
+    def test_unknown_movie(self):
+        response = self.client.get('/api/v1/movie/unknown/view/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_concurrent_views_are_not_lost(self):
+        movie_ids = [movie.id for movie in self.movies]
+
+        def hit(worker):
+            for i in range(200):
+                record_view(movie_ids[(worker + i) % len(movie_ids)])
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(hit, range(12)))
+            # flushing while hits keep arriving must not lose any of them
+            flush_views()
+
+        flush_views()
+        self.assertEqual(sum(Movie.objects.values_list('view', flat=True)), 12 * 200)
+
+    def test_flush_updates_in_batches(self):
+        for movie in self.movies:
+            record_view(movie.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            flush_views(batch_size=2)
+
+        updates = [query for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+
+        self.assertEqual(list(Movie.objects.values_list('view', flat=True)), [1, 1, 1])
+        self.assertEqual(flush_views(), 0)
+
+    @override_settings(API_COUNTER_CACHE_ALIAS=None)
+    def test_without_shared_cache_views_go_to_database(self):
+        response = self.client.get(f'/api/v1/movie/{self.movies[0].slug}/view/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Movie.objects.get(pk=self.movies[0].pk).view, 1)
+        self.assertEqual(flush_views(), 0)
+
+    def test_local_cache_fails_check(self):
+        errors = check_shared_caches(None)
+        self.assertEqual([error.id for error in errors], ['api.E001'])
+
+        with override_settings(API_COUNTER_CACHE_ALIAS=None):
+            self.assertEqual(check_shared_caches(None), [])
+
+
+class SlidingWindowThrottleTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        genre = Genre.objects.create(name="Drama", slug="drama")
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movie = create_movies(1, [genre], country)[0]
+
+    def setUp(self):
+        cache.clear()
+        rates = mock.patch.dict(SlidingWindowThrottle.THROTTLE_RATES, {'view': '3/minute'})
+        rates.start()
+        self.addCleanup(rates.stop)
+        self.now = 600
+
+        timer = mock.patch.object(SlidingWindowThrottle, 'timer', lambda throttle: self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def view(self):
+        return self.client.get(f'/api/v1/movie/{self.movie.slug}/view/').status_code
+
+    def test_limit_is_shared_by_throttle_instances(self):
+        self.assertEqual([self.view() for _ in range(4)], [200, 200, 200, 429])
+
+    def test_previous_window_is_weighted(self):
+        for _ in range(4):
+            self.view()
+
+        # half of the previous window's 4 requests still count
+        self.now = 690
+        self.assertEqual(self.view(), 200)
+        response = self.client.get(f'/api/v1/movie/{self.movie.slug}/view/')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+        self.now = 720
+        self.assertEqual(self.view(), 200)
+        self.assertEqual(self.view(), 429)
+
+
+@override_settings(API_COUNTER_CACHE_ALIAS='default')
+class ReactionTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        genre = Genre.objects.create(name="Drama", slug="drama")
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movie = create_movies(1, [genre], country)[0]
+        cls.user = User.objects.create_user(username="ali", password="secret-pass-123")
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def react(self, reaction, slug=None):
+        response = self.client.post(
+            f'/api/v1/movie/{slug or self.movie.slug}/{reaction}/',
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_like_dislike_toggle(self):
+        self.assertEqual(self.react('like'), {'like': 1, 'dislike': 0})
+        self.assertEqual(self.react('dislike'), {'like': 0, 'dislike': 1})
+        self.assertEqual(self.react('dislike'), {'like': 0, 'dislike': 0})
+        self.assertEqual(self.react('like'), {'like': 1, 'dislike': 0})
+
+        self.assertEqual(MovieReaction.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(Movie.objects.get(pk=self.movie.pk).like, 1)
+
+    def test_unknown_movie(self):
+        response = self.client.post(
+            '/api/v1/movie/unknown/like/',
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_renamed_slug_reused_by_another_movie(self):
+        old_slug = self.movie.slug
+        self.react('like')
+
+        movie = Movie.objects.get(pk=self.movie.pk)
+        movie.slug = 'renamed'
+        movie.save()
+        other = Movie.objects.create(
+            title="Other", slug=old_slug, country=self.movie.country,
+            language="Rus tilida", age_limit="12+", photo="movies/poster.jpg"
+        )
+
+        self.react('like', old_slug)
+        self.assertEqual(Movie.objects.get(pk=other.pk).like, 1)
+        self.assertEqual(Movie.objects.get(pk=self.movie.pk).like, 1)
+
+    def test_deleted_movie(self):
+        self.react('like')
+        Movie.objects.get(pk=self.movie.pk).delete()
+
+        response = self.client.post(
+            f'/api/v1/movie/{self.movie.slug}/like/',
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class ConcurrentReactionTest(TransactionTestCase):
+    # flushing with available_apps set truncates with CASCADE, which the raw
+    # PostgreSQL search table referencing api_movie needs
+    available_apps = ['django.contrib.auth', 'django.contrib.contenttypes', 'api']
+
+    def test_parallel_reactions_keep_counts_consistent(self):
+        genre = Genre.objects.create(name="Drama", slug="drama")
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        movie = create_movies(1, [genre], country)[0]
+        users = User.objects.bulk_create([User(username=f"user_{i}") for i in range(40)])
+
+        def run(i):
+            try:
+                user = users[i % len(users)]
+                return react(movie.id, user, LIKE if i % 3 else DISLIKE)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            list(executor.map(run, range(400)))
+
+        movie.refresh_from_db()
+        self.assertEqual(movie.like, MovieReaction.objects.filter(movie=movie, reaction=LIKE).count())
+        self.assertEqual(movie.dislike, MovieReaction.objects.filter(movie=movie, reaction=DISLIKE).count())
+        self.assertLessEqual(MovieReaction.objects.filter(movie=movie).count(), len(users))
+
+
+@skipUnless(connection.vendor == 'sqlite', "replicas are copies of the SQLite test database")
+@override_settings(DATABASE_REPLICAS=['replica_1', 'replica_2'])
+class ReplicaRoutingTest(TransactionTestCase):
+    # TestCase keeps the primary inside a transaction, which pins every read
+    replicas = ('replica_1', 'replica_2')
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        # copies of the migrated test database stand in for the replicas,
+        # registered after the test runner has set up its databases
+        cls.directory = tempfile.TemporaryDirectory()
+        source = sqlite3.connect(connection.settings_dict['NAME'])
+        for alias in cls.replicas:
+            path = Path(cls.directory.name) / f'{alias}.sqlite3'
+            target = sqlite3.connect(path)
+            source.backup(target)
+            target.close()
+            connections.settings[alias] = {**connection.settings_dict, 'NAME': path}
+        source.close()
+        cls.databases = cls.databases | set(cls.replicas)
+
+    @classmethod
+    def tearDownClass(cls):
+        for alias in cls.replicas:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        cls.directory.cleanup()
+        super().tearDownClass()
+
+    def setUp(self):
+        _down.clear()
+        Genre.objects.create(name="Primary", slug="primary")
+        for alias in self.replicas:
+            Genre.objects.using(alias).create(name=alias, slug=alias)
+            # flush skips the replicas, the router doesn't migrate them
+            self.addCleanup(Genre.objects.using(alias).all().delete)
+
+    def genres(self):
+        cache.clear()
+        response = self.client.get('/api/v1/genre/')
+        return [genre['name'] for genre in response.json()['data']['results']]
+
+    def test_safe_requests_read_from_replicas_in_turn(self):
+        self.assertCountEqual([self.genres(), self.genres()], [['replica_1'], ['replica_2']])
+
+    def test_failing_replica_is_skipped(self):
+        with mock.patch.object(connections['replica_1'], 'ensure_connection', side_effect=OperationalError):
+            self.assertEqual([self.genres(), self.genres()], [['replica_2'], ['replica_2']])
+
+        # until DATABASE_REPLICA_RETRY has passed
+        self.assertEqual([self.genres(), self.genres()], [['replica_2'], ['replica_2']])
+
+        _down['replica_2'] = _down['replica_1']
+        self.assertEqual(self.genres(), ['Primary'])
+
+    def test_write_pins_the_rest_of_the_request(self):
+        request = RequestFactory().get('/api/v1/genre/')
+        middleware = ReplicaMiddleware(lambda request: None)
+        middleware.process_request(request)
+        middleware.process_view(request, GenreViewSet.as_view({'get': 'list'}), (), {})
+
+        names = Genre.objects.order_by('name').values_list('name', flat=True)
+        self.assertIn(list(names), [['replica_1'], ['replica_2']])
+
+        Genre.objects.create(name="Komediya", slug="komediya")
+        self.assertEqual(list(names.all()), ["Komediya", "Primary"])
+
+        middleware.process_response(request, HttpResponse())
+        self.assertEqual(list(names.all()), ["Komediya", "Primary"])
+
+    def test_refill_after_invalidation_reads_primary(self):
+        self.assertIn(self.genres(), [['replica_1'], ['replica_2']])
+
+        # the replicas have not caught up with the new genre yet
+        Genre.objects.create(name="Komediya", slug="komediya")
+        response = self.client.get('/api/v1/genre/')
+        names = [genre['name'] for genre in response.json()['data']['results']]
+        self.assertCountEqual(names, ["Komediya", "Primary"])
+
+        self.assertTrue(cache.get(BUMPED_KEY.format('genre')))
+        # genres() clears the cache, as if API_CACHE_PRIMARY_TIMEOUT had passed
+        self.assertIn(self.genres(), [['replica_1'], ['replica_2']])
+
+    def test_view_action_reads_primary(self):
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        movie = create_movies(1, [], country)[0]
+        cache.clear()
+
+        self.assertEqual(self.client.get(f'/api/v1/movie/{movie.slug}/').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/v1/movie/{movie.slug}/view/').status_code, 200)
+
+
+class MovieSearchTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.drama = Genre.objects.create(name="Drama", slug="drama")
+        cls.comedy = Genre.objects.create(name="Komediya", slug="komediya")
+        cls.france = Country.objects.create(name="Fransiya", slug="fransiya")
+
+    def setUp(self):
+        cache.clear()
+        run_tasks_eagerly(self)
+
+    def create_movie(self, title, description, genres):
+        with self.captureOnCommitCallbacks(execute=True):
+            movie = Movie.objects.create(
+                title=title,
+                slug=title.lower().replace(' ', '-'),
+                description=description,
+                country=self.france,
+                language="Rus tilida",
+                age_limit="12+",
+                photo="movies/poster.jpg"
+            )
+            movie.genre.set(genres)
+        return movie
+
+    def search(self, query):
+        response = self.client.get('/api/v1/movie/', {'search': query})
+        return [movie['title'] for movie in response.json()['data']['results']]
+
+    def test_title_match_ranks_above_description_match(self):
+        self.create_movie("Qorong'i tun", "Detektiv haqida film", [self.drama])
+        self.create_movie("Detektiv", "Shahar haqida film", [self.drama])
+
+        self.assertEqual(self.search("detektiv"), ["Detektiv", "Qorong'i tun"])
+
+    def test_search_rejects_cursor_pagination(self):
+        response = self.client.get('/api/v1/movie/', {'search': 'bahor', 'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('pagination', response.json()['error']['errorMsg'])
+
+    def test_prefix_genre_and_country_match(self):
+        self.create_movie("Bahor", "", [self.comedy])
+        self.create_movie("Kuz", "", [self.drama])
+
+        self.assertEqual(self.search("komed"), ["Bahor"])
+        self.assertEqual(self.search("komediya fransiya"), ["Bahor"])
+        self.assertEqual(self.search("italiya"), [])
+
+    def test_index_follows_changes(self):
+        movie = self.create_movie("Bahor", "", [self.comedy])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.genre.set([self.drama])
+        self.assertEqual(self.search("drama"), ["Bahor"])
+        self.assertEqual(self.search("komediya"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.drama.name = "Melodrama"
+            self.drama.save()
+        self.assertEqual(self.search("melodrama"), ["Bahor"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.delete()
+        self.assertEqual(self.search("bahor"), [])
+
+    def test_punctuation_only_query_returns_nothing(self):
+        self.create_movie("Bahor", "", [self.comedy])
+        self.assertEqual(self.search('"*'), [])
+
+
+class ImportMoviesCommandTest(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        Genre.objects.create(name="Drama", slug="drama")
+        run_tasks_eagerly(self)
+
+    def run_import(self, name, content, **options):
+        path = self.directory / name
+        path.write_text(content, encoding='utf-8')
+        call_command('import_movies', str(path), stdout=io.StringIO(), stderr=io.StringIO(), **options)
+
+    def test_import_csv(self):
+        video_items = json.dumps([
+            {'type': 'trailer', 'embed_input': 'https://youtu.be/abc'},
+            {'type': 'series', 'part': 1, 'embed_input': '<iframe src="https://mover.uz/video/embed/x1"></iframe>'},
+            {'type': 'series', 'part': 2, 'embed_input': 'https://mover.uz/video/embed/x2'},
+        ])
+        rows = io.StringIO()
+        writer = csv.writer(rows)
+        writer.writerow(['title', 'country', 'genres', 'language', 'year', 'age_limit', 'photo', 'video_items'])
+        writer.writerow(['Bahor', 'fransiya', 'drama,komediya', 'Rus tilida', 2020, '12+', 'movies/a.jpg', video_items])
+        writer.writerow(['Kuz', 'fransiya', 'drama', 'Nemis tilida', 2020, '12+', 'movies/b.jpg', ''])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_import('movies.csv', rows.getvalue(), batch_size=1)
+
+        movie = Movie.objects.get(slug='bahor')
+        self.assertEqual(Movie.objects.count(), 1)
+        self.assertEqual(movie.country.name, 'Fransiya')
+        self.assertEqual(sorted(movie.genre.values_list('slug', flat=True)), ['drama', 'komediya'])
+        self.assertEqual(
+            list(movie.movie_url.order_by('id').values_list('embed_url', flat=True)),
+            ['https://youtu.be/abc', 'https://mover.uz/video/embed/x1', 'https://mover.uz/video/embed/x2']
+        )
+        self.assertEqual(self.client.get('/api/v1/movie/', {'search': 'bahor'}).json()['data']['total'], 1)
+
+    def test_import_jsonl_skips_existing_and_invalid_rows(self):
+        row = {'title': 'Bahor', 'country': 'fransiya', 'genres': ['drama'], 'language': 'Rus tilida',
+               'year': 2020, 'age_limit': '12+', 'photo': 'movies/a.jpg'}
+        invalid = dict(row, title='Kuz', video_items=[{'type': 'movie', 'embed_input': 'http://insecure'}])
+        content = '\n'.join(json.dumps(item) for item in (row, row, invalid))
+
+        self.run_import('movies.jsonl', content, batch_size=2)
+        self.run_import('movies.jsonl', content)
+
+        self.assertEqual(list(Movie.objects.values_list('slug', flat=True)), ['bahor'])
+        self.assertEqual(MovieURL.objects.count(), 0)
+
+    def test_skipped_rows_create_no_genres_or_countries(self):
+        Country.objects.create(name="Fransiya", slug="france")
+        Genre.objects.create(name="Tarixiy", slug="history")
+        row = {'title': 'Bahor', 'country': 'france', 'genres': ['drama'], 'language': 'Rus tilida',
+               'year': 2020, 'age_limit': '12+', 'photo': 'movies/a.jpg'}
+        rows = [
+            row,
+            dict(row, title='Qish', genres=['komediya'], age_limit='99+'),
+            dict(row, title='Bahor', country='italiya', genres=['jangari']),
+            dict(row, title='Yoz', country='fransiya'),
+            # the genre's name is taken, the row's new country is rolled back
+            dict(row, title='Kuz', country='italiya', genres=['tarixiy']),
+            dict(row, title='Qish', genres=['DRAMA']),
+            dict(row, title='Qish', country='fr ance'),
+            # still imported after the failed inserts above
+            dict(row, title='Yoz', country='italiya', genres=['jangari']),
+        ]
+
+        self.run_import('movies.jsonl', '\n'.join(json.dumps(item) for item in rows))
+
+        self.assertEqual(sorted(Movie.objects.values_list('title', flat=True)), ['Bahor', 'Yoz'])
+        self.assertEqual(Movie.objects.get(title='Yoz').country.slug, 'italiya')
+        self.assertEqual(sorted(Genre.objects.values_list('slug', flat=True)), ['drama', 'history', 'jangari'])
+        self.assertEqual(sorted(Country.objects.values_list('slug', flat=True)), ['france', 'italiya'])
+
+
+class PhotoVariantsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.country = Country.objects.create(name="Fransiya", slug="fransiya")
+
+    def setUp(self):
+        cache.clear()
+        run_tasks_eagerly(self)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name, MOVIE_PHOTO_WIDTHS=(160, 320))
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def upload(self, color):
+        content = io.BytesIO()
+        Image.new('RGB', (400, 600), color).save(content, 'PNG')
+        return SimpleUploadedFile('poster.png', content.getvalue(), content_type='image/png')
+
+    def create_movie(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            movie = Movie.objects.create(title="Bahor", slug="bahor", country=self.country, language="Rus tilida",
+                                         age_limit="12+", photo=self.upload('red'))
+        movie.refresh_from_db()
+        return movie
+
+    def test_variants_are_generated_after_upload(self):
+        movie = self.create_movie()
+
+        self.assertEqual(movie.photo_variants['webp'], {
+            '160': VARIANT_PATH.format(hash=movie.photo_hash, width=160, extension='webp'),
+            '320': VARIANT_PATH.format(hash=movie.photo_hash, width=320, extension='webp'),
+        })
+        with default_storage.open(movie.photo_variants['jpeg']['320']) as file, Image.open(file) as image:
+            self.assertEqual((image.format, image.size), ('JPEG', (320, 480)))
+        self.assertTrue(movie.photo_placeholder.startswith('data:image/jpeg;base64,'))
+
+        data = self.client.get(f'/api/v1/movie/{movie.slug}/').json()['data']
+        self.assertEqual(data['photo_variants']['webp']['160'],
+                         f'http://testserver/media/{movie.photo_variants["webp"]["160"]}')
+        self.assertNotIn('photo_hash', data)
+
+    def test_resave_with_the_same_poster_does_no_work(self):
+        movie = self.create_movie()
+
+        with mock.patch('api.images.build_variants') as build_variants:
+            with self.captureOnCommitCallbacks(execute=True):
+                movie.title = "Kuz"
+                movie.save()
+        build_variants.assert_not_called()
+
+    def test_old_variants_are_deleted(self):
+        movie = self.create_movie()
+        old_paths = list(movie.photo_variants['webp'].values())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.photo = self.upload('blue')
+            movie.save()
+        movie.refresh_from_db()
+
+        self.assertFalse(any(default_storage.exists(path) for path in old_paths))
+        new_paths = list(movie.photo_variants['jpeg'].values())
+        self.assertTrue(all(default_storage.exists(path) for path in new_paths))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            movie.delete()
+        self.assertFalse(any(default_storage.exists(path) for path in new_paths))
+
+
+class SimilarMoviesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        drama = Genre.objects.create(name="Drama", slug="drama")
+        comedy = Genre.objects.create(name="Komediya", slug="komediya")
+        france = Country.objects.create(name="Fransiya", slug="fransiya")
+        italy = Country.objects.create(name="Italiya", slug="italiya")
+
+        cls.movies = {}
+        for title, genres, country, language, age_limit, year in [
+            ("Bahor", [drama, comedy], france, "Rus tilida", "12+", 2020),
+            ("Yoz", [drama, comedy], france, "Rus tilida", "12+", 2021),
+            ("Kuz", [drama], italy, "Ingliz tilida", "18+", 2020),
+            ("Qish", [comedy], italy, "O'zbek tilida", "0+", 1990),
+        ]:
+            movie = Movie.objects.create(title=title, slug=title.lower(), country=country, language=language,
+                                         age_limit=age_limit, year=year, photo="movies/poster.jpg")
+            movie.genre.set(genres)
+            cls.movies[title] = movie
+
+    def setUp(self):
+        cache.clear()
+
+    def similar(self, title):
+        response = self.client.get(f'/api/v1/movie/{self.movies[title].slug}/similar/')
+        return [movie['title'] for movie in response.json()['data']]
+
+    def test_neighbours_are_ranked_by_cosine_similarity(self):
+        rebuild_similar(k=2, batch_size=3)
+
+        self.assertEqual(self.similar("Bahor"), ["Yoz", "Kuz"])
+        self.assertEqual(self.similar("Qish"), ["Bahor", "Yoz"])
+        self.assertEqual(SimilarMovie.objects.count(), 8)
+
+    def test_rebuild_replaces_previous_neighbours(self):
+        rebuild_similar(k=2, batch_size=3)
+        self.movies["Yoz"].delete()
+        rebuild_similar(k=2, batch_size=3)
+
+        self.assertEqual(self.similar("Bahor"), ["Kuz", "Qish"])
+        self.assertEqual(SimilarMovie.objects.count(), 6)
+
+    def test_unknown_movie(self):
+        self.assertEqual(self.client.get('/api/v1/movie/yoq/similar/').status_code, 404)
+
+
+class TrendingTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        drama = Genre.objects.create(name="Drama", slug="drama")
+        comedy = Genre.objects.create(name="Komediya", slug="komediya")
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movies = create_movies(3, [drama], country)
+        cls.movies[2].genre.add(comedy)
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        update_trending(self.now)
+
+    def add_activity(self, movie, hours, **counters):
+        Movie.objects.filter(pk=movie.pk).update(**{field: F(field) + value for field, value in counters.items()})
+        update_trending(self.now + timedelta(hours=hours))
+
+    def trending(self, **params):
+        cache.clear()
+        response = self.client.get('/api/v1/movie/trending/', params)
+        return [movie['slug'] for movie in response.json()['data']]
+
+    @override_settings(MOVIE_TRENDING_HALF_LIFE=60 * 60 * 12)
+    def test_recent_activity_outranks_decayed_activity(self):
+        self.assertEqual(self.trending(), [])
+
+        self.add_activity(self.movies[0], hours=1, view=10)
+        self.add_activity(self.movies[1], hours=1, like=4, dislike=1)
+        self.assertEqual(self.trending(), ['film-1', 'film-0'])
+
+        self.add_activity(self.movies[0], hours=13, view=4)
+        self.assertAlmostEqual(MovieTrend.objects.get(movie=self.movies[0]).score, 9)
+        self.assertAlmostEqual(MovieTrend.objects.get(movie=self.movies[1]).score, 8.5)
+        self.assertEqual(self.trending(), ['film-0', 'film-1'])
+
+    def test_scoped_by_genre_and_new_movies(self):
+        self.add_activity(self.movies[0], hours=1, view=10)
+        self.add_activity(self.movies[2], hours=1, view=5)
+        self.assertEqual(self.trending(genre='komediya'), ['film-2'])
+
+        country = Country.objects.create(name="Italiya", slug="italiya")
+        Movie.objects.create(title="Yangi", slug="yangi", country=country, language="Rus tilida",
+                             age_limit="12+", photo="movies/poster.jpg", view=50)
+        update_trending(self.now + timedelta(hours=1))
+        self.assertEqual(self.trending(country='italiya'), ['yangi'])
+
+
+class MovieFacetsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        drama = Genre.objects.create(name="Drama", slug="drama")
+        comedy = Genre.objects.create(name="Komediya", slug="komediya")
+        france = Country.objects.create(name="Fransiya", slug="fransiya")
+        italy = Country.objects.create(name="Italiya", slug="italiya")
+
+        movies = create_movies(3, [drama], france)
+        movies[0].genre.add(comedy)
+        Movie.objects.filter(pk=movies[2].pk).update(country=italy, year=2019, language="Ingliz tilida")
+
+    def setUp(self):
+        cache.clear()
+
+    def facets(self, **params):
+        response = self.client.get('/api/v1/movie/facets/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_counts_without_filters(self):
+        with self.assertNumQueries(5):
+            facets = self.facets()
+
+        self.assertEqual(facets['genre'], [{'slug': 'drama', 'name': 'Drama', 'count': 3},
+                                           {'slug': 'komediya', 'name': 'Komediya', 'count': 1}])
+        self.assertEqual(facets['country'], [{'slug': 'fransiya', 'name': 'Fransiya', 'count': 2},
+                                             {'slug': 'italiya', 'name': 'Italiya', 'count': 1}])
+        self.assertEqual(facets['year'], [{'value': 2020, 'count': 2}, {'value': 2019, 'count': 1}])
+        self.assertEqual(facets['age_limit'], [{'value': '12+', 'count': 3}])
+
+    def test_facet_ignores_its_own_filter(self):
+        facets = self.facets(country='italiya')
+
+        self.assertEqual([row['count'] for row in facets['country']], [2, 1])
+        self.assertEqual(facets['genre'], [{'slug': 'drama', 'name': 'Drama', 'count': 1}])
+        self.assertEqual(facets['language'], [{'value': 'Ingliz tilida', 'count': 1}])
+
+        facets = self.facets(genre='komediya', year=2020)
+        self.assertEqual(facets['genre'], [{'slug': 'drama', 'name': 'Drama', 'count': 2},
+                                           {'slug': 'komediya', 'name': 'Komediya', 'count': 1}])
+        self.assertEqual(facets['year'], [{'value': 2020, 'count': 1}])
+
+    def test_cached_by_normalized_filters(self):
+        self.facets(year=2020, country='fransiya')
+        response = self.client.get('/api/v1/movie/facets/?country=fransiya&year=2020')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get('/api/v1/movie/facets/', {'year': 'abc'}).status_code, 400)
+
+
+class RendererTest(TestCase):
+
+    def test_orjson_matches_default_renderer(self):
+        data = {'data': {'price': Decimal('1.50'), 'message': gettext_lazy("Salom"), 1: [None, True]}}
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_error_envelope(self):
+        response = self.client.get('/api/v1/movie/yoq/')
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.json(), {
+            'data': None,
+            'error': {'errorId': 404, 'isFriendly': True, 'errorMsg': "No Movie matches the given query."},
+            'success': False
+        })
+
+
+urlpatterns = [
+    path('api/v1/', include(async_urlpatterns)),
+]
+
+
+@override_settings(ROOT_URLCONF='api.tests')
+class AsyncReadTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.genre = Genre.objects.create(name="Drama", slug="drama")
+        cls.country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movies = create_movies(15, [cls.genre], cls.country)
+        SimilarMovie.objects.create(movie=cls.movies[0], similar=cls.movies[1], rank=1, score=0.9)
+
+    def setUp(self):
+        cache.clear()
+
+    @sync_to_async
+    def sync_get(self, url, params=None):
+        with self.settings(ROOT_URLCONF='movie.urls'):
+            return self.client.get(url, params)
+
+    async def test_list_matches_sync_view(self):
+        response = await self.async_client.get('/api/v1/movie/', {'page': 2, 'genre': 'drama'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+        cache.clear()
+        expected = await self.sync_get('/api/v1/movie/', {'page': 2, 'genre': 'drama'})
+
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(len(response.json()['data']['results']), 5)
+
+        # the entry written by the sync view is shared
+        response = await self.async_client.get('/api/v1/movie/', {'page': 2, 'genre': 'drama'})
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    async def test_detail_and_similar(self):
+        for url in (f'/api/v1/movie/{self.movies[0].slug}/', f'/api/v1/movie/{self.movies[0].slug}/similar/',
+                    '/api/v1/genre/drama/', '/api/v1/country/', '/api/v1/country/fransiya/'):
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                cache.clear()
+                self.assertEqual(response.json(), (await self.sync_get(url)).json())
+
+        # the country detail keeps its bare shape
+        response = await self.async_client.get('/api/v1/country/fransiya/')
+        self.assertEqual(response.json()['slug'], 'fransiya')
+
+    async def test_errors_and_fallback(self):
+        response = await self.async_client.get('/api/v1/movie/yoq/')
+        self.assertEqual((response.status_code, response.json()['error']['errorId']), (404, 404))
+
+        response = await self.async_client.get('/api/v1/movie/', {'page': 9})
+        self.assertEqual(response.status_code, 404)
+
+        response = await self.async_client.get('/api/v1/movie/', {'pagination': 'cursor'})
+        self.assertIn('next', response.json()['data'])
+
+        for page in ('last', '0', 'x'):
+            with self.subTest(page=page):
+                response = await self.async_client.get('/api/v1/movie/', {'page': page})
+                cache.clear()
+                sync_response = await self.sync_get(f'/api/v1/movie/?page={page}')
+                self.assertEqual((response.status_code, response.json()),
+                                 (sync_response.status_code, sync_response.json()))
+
+        response = await self.async_client.post('/api/v1/genre/', {'name': "Komediya"})
+        self.assertEqual(response.status_code, 401)
+
+
+class MovieExportTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        drama = Genre.objects.create(name="Drama", slug="drama")
+        comedy = Genre.objects.create(name="Komediya", slug="komediya")
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        cls.movies = create_movies(30, [drama], country)
+        cls.movies[0].genre.add(comedy)
+        cls.admin = User.objects.create_user(username="admin", password="secret-pass-123", is_staff=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def export(self, user, **params):
+        return self.client.get('/api/v1/movie/export/', params,
+                               HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    @override_settings(MOVIE_EXPORT_CHUNK_SIZE=10)
+    def test_ndjson_streams_in_chunks(self):
+        response = self.export(self.admin)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        # one cursor over the movies, plus one query per prefetched relation for each of the three chunks
+        with self.assertNumQueries(7):
+            rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+        self.assertEqual(len(rows), 30)
+        self.assertEqual(rows[-1]['country']['slug'], 'fransiya')
+        self.assertEqual(len(rows[-1]['video_items']), 1)
+
+    def test_csv_honours_filters(self):
+        response = self.export(self.admin, output='csv', genre='komediya')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['slug'], self.movies[0].slug)
+        self.assertEqual(rows[0]['genre'], 'drama,komediya')
+        self.assertEqual(json.loads(rows[0]['video_items'])[0]['type'], 'trailer')
+
+    def test_admin_only(self):
+        user = User.objects.create_user(username="ali", password="secret-pass-123")
+        self.assertEqual(self.export(user).status_code, 403)
+        self.assertEqual(self.export(self.admin, output='xml').status_code, 400)
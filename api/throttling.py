@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import ScopedRateThrottle
+
+
+def get_cache():
+    return caches[settings.API_THROTTLE_CACHE_ALIAS]
+
+
+class SlidingWindowThrottle(ScopedRateThrottle):
+    """
+    ScopedRateThrottle with a sliding window counter instead of DRF's list of
+    request timestamps: two integers per client and scope, updated with an
+    atomic incr, so every worker sharing the cache enforces the same limit.
+
+    The request count is estimated as the current window's count plus the
+    previous window's count weighted by how much of it still overlaps the
+    sliding window.
+    """
+    cache_format = 'api:throttle:%(scope)s:%(ident)s'
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window, self.elapsed = divmod(self.now, self.duration)
+        window = int(window)
+
+        cache = get_cache()
+        current_key = f'{self.key}:{window}'
+
+        # count denied requests as well, a client retrying in a loop stays
+        # throttled instead of getting a request through every so often
+        self.current = self._incr(cache, current_key)
+        self.previous = cache.get(f'{self.key}:{window - 1}', 0)
+
+        weight = 1 - self.elapsed / self.duration
+        return self.current + self.previous * weight <= self.num_requests
+
+    def _incr(self, cache, key):
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # the previous window is read for one more window after this one
+            if cache.add(key, 1, timeout=self.duration * 2 + 1):
+                return 1
+            return cache.incr(key)
+
+    def wait(self):
+        remaining = self.duration - self.elapsed
+        if self.current >= self.num_requests or not self.previous:
+            return remaining
+
+        # the previous window's weight decays until the next request fits
+        allowed = self.num_requests - self.current - 1
+        elapsed = self.duration * (1 - allowed / self.previous)
+        return max(elapsed - self.elapsed, 0)
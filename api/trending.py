@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Max, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Movie, MovieTrend
+
+# points for every view, like and dislike since the last update
+WEIGHTS = {
+    'view': 1.0,
+    'like': 5.0,
+    'dislike': -3.0,
+}
+
+
+def add_movies(now, batch_size=1000):
+    # a new movie's counters so far all count as recent activity
+    movie_ids = Movie.objects.filter(trend__isnull=True).values_list('id', flat=True)
+    batch = []
+    for movie_id in movie_ids.iterator(chunk_size=batch_size):
+        batch.append(MovieTrend(movie_id=movie_id, updated_at=now))
+        if len(batch) == batch_size:
+            MovieTrend.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    MovieTrend.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def update_trending(now=None):
+    """
+    Decay every trending score by the time passed since the last update and
+    add the views, likes and dislikes recorded since then.
+    """
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        last_update = MovieTrend.objects.aggregate(last_update=Max('updated_at'))['last_update']
+        add_movies(now)
+
+        decay = 1.0
+        if last_update is not None:
+            elapsed = max((now - last_update).total_seconds(), 0)
+            decay = 0.5 ** (elapsed / settings.MOVIE_TRENDING_HALF_LIFE)
+
+        movie = Movie.objects.filter(pk=OuterRef('movie_id'))
+        counters = {field: Subquery(movie.values(field)[:1]) for field in WEIGHTS}
+
+        score = F('score') * decay
+        for field, weight in WEIGHTS.items():
+            score += (counters[field] - F(field)) * weight
+
+        return MovieTrend.objects.update(
+            score=ExpressionWrapper(score, output_field=FloatField()),
+            updated_at=now,
+            **counters
+        )
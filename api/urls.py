@@ -1,5 +1,8 @@
+from django.conf import settings
+from django.urls import URLPattern
 from rest_framework import routers
 
+from .async_views import async_read
 from .views import GenreViewSet, CountryViewSet, MovieViewSet
 
 router = routers.DefaultRouter()
@@ -8,4 +11,25 @@ router.register('genre', GenreViewSet)
 router.register('country', CountryViewSet)
 router.register('movie', MovieViewSet)
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls
+
+# route name: (viewset, action) of the reads served by api.async_views
+ASYNC_READS = {
+    'genre-list': (GenreViewSet, 'list'),
+    'genre-detail': (GenreViewSet, 'retrieve'),
+    'country-list': (CountryViewSet, 'list'),
+    'country-detail': (CountryViewSet, 'retrieve'),
+    'movie-list': (MovieViewSet, 'list'),
+    'movie-detail': (MovieViewSet, 'retrieve'),
+    'movie-similar': (MovieViewSet, 'similar'),
+}
+
+async_urlpatterns = [
+    URLPattern(pattern.pattern, async_read(*ASYNC_READS[pattern.name], pattern.callback),
+               pattern.default_args, pattern.name)
+    if pattern.name in ASYNC_READS else pattern
+    for pattern in urlpatterns
+]
+
+if settings.API_ASYNC_VIEWS:
+    urlpatterns = async_urlpatterns
@@ -1,12 +1,25 @@
+from django.conf import settings
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets, status, permissions, filters
+from django_filters.utils import translate_validation
+from rest_framework import viewsets, permissions, filters
 from rest_framework.decorators import action
-from rest_framework.response import Response
-
-from .serializers import GenreSerializer, MovieSerializer, CountrySerializer
-from .models import Genre, Country, Movie, MovieReaction
-from .filters import MovieFilter
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.settings import api_settings
+
+from .cache import cache_response
+from .counters import get_movie_id, record_view
+from .exporters import EXPORT_FORMATS
+from .facets import get_facets
+from .serializers import GenreSerializer, MovieSerializer, CountrySerializer, MovieURLSerializer, get_field_selection
+from .models import Genre, Country, Movie, MovieURL
+from .filters import EpisodeFilter, MovieFilter, MovieSearchFilter
+from .pagination import EpisodePagination, MovieCursorPagination
 from .permissions import IsAdminOrReadOnly
+from .reactions import LIKE, DISLIKE, react
+from .responses import success_response
 
 
 class GenreViewSet(viewsets.ModelViewSet):
@@ -18,15 +31,17 @@ class GenreViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
     lookup_field = 'slug'
     throttle_scope = 'genre'
+    cache_dependencies = ('genre',)
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
+    @cache_response
     def retrieve(self, request, *args, **kwargs):
         response = super().retrieve(request, *args, **kwargs)
 
-        return Response({
-            'data': response.data,
-            'error': None,
-            'success': True
-        }, status=status.HTTP_200_OK)
+        return success_response(response.data)
 
 
 class CountryViewSet(viewsets.ModelViewSet):
@@ -38,100 +53,194 @@ class CountryViewSet(viewsets.ModelViewSet):
     search_fields = ['name']
     lookup_field = 'slug'
     throttle_scope = 'country'
+    cache_dependencies = ('country',)
+    # the detail is the bare object, without the response envelope
+    envelope_detail = False
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
 
 class MovieViewSet(viewsets.ModelViewSet):
-    queryset = Movie.objects.all()
+    queryset = Movie.objects.select_related('country').prefetch_related('genre', 'movie_url')
     serializer_class = MovieSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filter_backends = [DjangoFilterBackend, MovieSearchFilter]
     filterset_class = MovieFilter
-    search_fields = ['name']
     lookup_field = 'slug'
     throttle_scope = 'movie'
-
+    cache_dependencies = ('movie', 'genre', 'country')
+    list_actions = ('list', 'trending', 'similar')
+    compression = {}
+    read_primary = False
+
+    def get_field_selection(self):
+        if self.request is None or self.request.method != 'GET' or self.action == 'export':
+            return None
+        if self.action in self.list_actions:
+            # lists carry an episode count and the trailer, see episodes()
+            return get_field_selection(self.request.query_params, default_expand=('country', 'genre'))
+        return get_field_selection(self.request.query_params)
+
+    def get_queryset(self):
+        selection = self.get_field_selection()
+        if selection is None:
+            return super().get_queryset()
+
+        # only load the columns and relations that will be serialized
+        fields, expand = selection
+        queryset = Movie.objects.all()
+
+        if 'country' in expand:
+            queryset = queryset.select_related('country')
+        if fields is None or 'genre' in fields:
+            queryset = queryset.prefetch_related('genre')
+        if 'video_items' in expand:
+            queryset = queryset.prefetch_related('movie_url')
+        elif self.action in self.list_actions:
+            if fields is None or 'episode_count' in fields:
+                episodes = (MovieURL.objects.filter(movie=OuterRef('pk')).order_by()
+                            .values('movie').annotate(count=Count('id')).values('count'))
+                queryset = queryset.annotate(episode_count=Coalesce(Subquery(episodes), 0))
+            if fields is None or 'trailer' in fields:
+                queryset = queryset.prefetch_related(
+                    Prefetch('movie_url', queryset=MovieURL.objects.filter(type='trailer').order_by('id'),
+                             to_attr='trailers')
+                )
+
+        if fields is not None:
+            columns = {field.name for field in Movie._meta.concrete_fields}
+            # the cursor pagination reads created_at
+            queryset = queryset.only('id', 'slug', 'created_at', *(fields & columns))
+
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        selection = self.get_field_selection()
+        if selection is not None:
+            context['field_selection'] = selection
+        return context
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request is not None and self.request.query_params.get('pagination') == 'cursor':
+                # cursor pages are ordered by created_at, not by relevance
+                if self.request.query_params.get(api_settings.SEARCH_PARAM, '').strip():
+                    raise ValidationError({'pagination': "Cursor pagination cannot be combined with search."})
+                self._paginator = MovieCursorPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
     def retrieve(self, request, *args, **kwargs):
         response = super().retrieve(request, *args, **kwargs)
 
-        return Response({
-            'data': response.data,
-            'error': None,
-            'success': True
-        }, status=status.HTTP_200_OK)
+        return success_response(response.data)
+
+    def _react(self, request, slug, reaction):
+        movie_id = get_movie_id(slug)
+        counts = react(movie_id, request.user, reaction) if movie_id is not None else None
+        if counts is None:
+            raise NotFound()
 
-    @action(detail=True, methods=['POST'], permission_classes=[permissions.IsAuthenticated])
+        return success_response(counts)
+
+    @action(detail=True, methods=['POST'], permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='reaction')
     def like(self, request, slug=None):
-        movie = self.get_object()
-        user = request.user
-
-        reaction, created = MovieReaction.objects.get_or_create(movie=movie, user=user)
-
-        if not created:
-            if reaction.reaction == 'like':
-                movie.like -= 1
-                reaction.delete()
-            elif reaction.reaction == 'dislike':
-                movie.dislike -= 1
-                movie.like += 1
-                reaction.reaction = 'like'
-                reaction.save()
-        else:
-            movie.like += 1
-            reaction.reaction = 'like'
-            reaction.save()
-
-        movie.save()
-
-        return Response({
-            'data': {
-                'like': int(movie.like),
-                'dislike': int(movie.dislike)
-            },
-            'error': None,
-            'success': True
-        }, status=status.HTTP_200_OK)
-
-    @action(detail=True, methods=['POST'], permission_classes=[permissions.IsAuthenticated])
+        return self._react(request, slug, LIKE)
+
+    @action(detail=True, methods=['POST'], permission_classes=[permissions.IsAuthenticated],
+            throttle_scope='reaction')
     def dislike(self, request, slug=None):
-        movie = self.get_object()
-        user = request.user
-
-        reaction, created = MovieReaction.objects.get_or_create(movie=movie, user=user)
-
-        if not created:
-            if reaction.reaction == 'dislike':
-                movie -= 1
-                reaction.delete()
-            elif reaction.reaction == 'like':
-                movie.like -= 1
-                movie.dislike += 1
-                reaction.reaction = 'dislike'
-                reaction.save()
-        else:
-            movie.dislike += 1
-            reaction.reaction = 'dislike'
-            reaction.save()
-
-        movie.save()
-
-        return Response({
-            'data': {
-                'like': int(movie.like),
-                'dislike': int(movie.dislike)
-            },
-            'error': None,
-            'success': True
-        }, status=status.HTTP_200_OK)
-
-    @action(detail=True, methods=['GET'], permission_classes=[permissions.AllowAny])
+        return self._react(request, slug, DISLIKE)
+
+    # large streams, favour CPU over bytes
+    @action(detail=False, methods=['GET'], permission_classes=[permissions.IsAdminUser],
+            compression={'levels': {'gzip': 1}})
+    def export(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            raise ValidationError({'output': f"Choose one of: {', '.join(EXPORT_FORMATS)}."})
+
+        exporter, content_type = EXPORT_FORMATS[output]
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.get_serializer()
+
+        rows = (serializer.to_representation(movie)
+                for movie in queryset.iterator(chunk_size=settings.MOVIE_EXPORT_CHUNK_SIZE))
+
+        response = StreamingHttpResponse(exporter(rows), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="movies.{output}"'
+        return response
+
+    @action(detail=False, methods=['GET'])
+    @cache_response
+    def facets(self, request):
+        search = request.query_params.get(api_settings.SEARCH_PARAM, '').strip()
+
+        return success_response(get_facets(request.query_params, search))
+
+    @action(detail=False, methods=['GET'])
+    @cache_response
+    def trending(self, request):
+        # scores are updated by api.trending.update_trending, cached pages
+        # simply expire
+        queryset = (self.filter_queryset(self.get_queryset())
+                    .filter(trend__score__gt=0)
+                    .order_by('-trend__score', '-trend__movie')[:settings.MOVIE_TRENDING_SIZE])
+        serializer = self.get_serializer(queryset, many=True)
+
+        return success_response(serializer.data)
+
+    @action(detail=True, methods=['GET'])
+    @cache_response
+    def episodes(self, request, slug=None):
+        movie_id = get_movie_id(slug)
+        if movie_id is None:
+            raise NotFound()
+
+        filterset = EpisodeFilter(request.query_params, queryset=MovieURL.objects.filter(movie_id=movie_id))
+        if not filterset.is_valid():
+            raise translate_validation(filterset.errors)
+
+        paginator = EpisodePagination()
+        page = paginator.paginate_queryset(filterset.qs, request, view=self)
+        return paginator.get_paginated_response(MovieURLSerializer(page, many=True).data)
+
+    @action(detail=True, methods=['GET'])
+    @cache_response
+    def similar(self, request, slug=None):
+        movie_id = get_movie_id(slug)
+        if movie_id is None:
+            raise NotFound()
+
+        # neighbours are precomputed by api.similarity.rebuild_similar
+        queryset = self.get_queryset().filter(similar_entries__movie_id=movie_id).order_by('similar_entries__rank')
+        serializer = self.get_serializer(queryset, many=True)
+
+        return success_response(serializer.data)
+
+    @action(detail=True, methods=['GET'], permission_classes=[permissions.AllowAny], throttle_scope='view',
+            read_primary=True)
     def view(self, request, slug=None):
-        movie = self.get_object()
+        movie_id = get_movie_id(slug)
+        if movie_id is None:
+            raise NotFound()
 
-        movie.view += 1
-        movie.save()
+        record_view(movie_id)
 
-        return Response({
-            'error': None,
-            'success': True
-        }, status=status.HTTP_200_OK)
+        return success_response()
@@ -0,0 +1,104 @@
+"""
+Write contention on SQLite: writer processes bump view counters the way
+api.counters.flush_views does while reader processes page through the
+catalogue, once with SQLite's default rollback journal and once with the
+pragmas of the 'sqlite' profile in movie.settings.
+
+    python benchmarks/db_contention.py --writers 4 --readers 4
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connections, transaction  # noqa: E402
+from django.db.models import F  # noqa: E402
+
+from api.models import Country, Movie  # noqa: E402
+
+MOVIES = 1000
+PROFILES = {
+    'rollback journal': 'PRAGMA journal_mode=DELETE; PRAGMA synchronous=FULL',
+    'sqlite profile': settings.DATABASES['default']['OPTIONS']['init_command'],
+}
+
+
+def write(deadline, ids):
+    count = 0
+    while time.monotonic() < deadline:
+        with transaction.atomic():
+            for movie_id in random.sample(ids, 10):
+                Movie.objects.filter(pk=movie_id).update(view=F('view') + 1)
+        count += 1
+    return count
+
+
+def read(deadline, ids):
+    count = 0
+    while time.monotonic() < deadline:
+        offset = random.randrange(0, MOVIES - 20)
+        list(Movie.objects.order_by('-view', 'id').values('id', 'title', 'view')[offset:offset + 20])
+        count += 1
+    return count
+
+
+def run(task, deadline, ids):
+    # each process opens its own connection
+    connections['default'].close()
+    return task, task(deadline, ids)
+
+
+def measure(init_command, writers, readers, duration):
+    with tempfile.TemporaryDirectory() as directory:
+        database = settings.DATABASES['default']
+        database['NAME'] = Path(directory) / 'db.sqlite3'
+        database['OPTIONS']['init_command'] = init_command
+        connections['default'].close()
+        del connections['default']
+
+        call_command('migrate', verbosity=0)
+        country = Country.objects.create(name="Fransiya", slug="fransiya")
+        ids = [movie.id for movie in Movie.objects.bulk_create([
+            Movie(title=f"Film {i}", slug=f"film-{i}", country=country, language="Rus tilida",
+                  year=2020, age_limit="12+", photo="movies/poster.jpg") for i in range(MOVIES)
+        ])]
+        connections['default'].close()
+
+        deadline = time.monotonic() + duration
+        tasks = [(write, deadline, ids)] * writers + [(read, deadline, ids)] * readers
+        with multiprocessing.get_context('fork').Pool(len(tasks)) as pool:
+            results = pool.starmap(run, tasks)
+
+        totals = {write: 0, read: 0}
+        for task, count in results:
+            totals[task] += count
+        return totals[write] / duration, totals[read] / duration
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    options = parser.parse_args()
+
+    for name, init_command in PROFILES.items():
+        writes, reads = measure(init_command, options.writers, options.readers, options.duration)
+        print(f"{name:>16}: {writes:8.1f} write transactions/s, {reads:8.1f} reads/s")
+
+
+if __name__ == '__main__':
+    main()
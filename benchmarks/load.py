@@ -0,0 +1,88 @@
+"""
+Minimal HTTP/1.1 load generator: keeps ``--concurrency`` keep-alive
+connections busy for ``--duration`` seconds and reports requests/sec and
+latency percentiles. Used to compare the WSGI and ASGI deployments:
+
+    gunicorn movie.wsgi -w 4 --threads 8 -b 127.0.0.1:8001
+    API_ASYNC_VIEWS=1 uvicorn movie.asgi:application --workers 4 --port 8002
+
+    python benchmarks/load.py http://127.0.0.1:8001/api/v1/movie/ -c 256
+    python benchmarks/load.py http://127.0.0.1:8002/api/v1/movie/ -c 256
+
+``--bust`` adds a unique query parameter so the response cache is missed.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from urllib.parse import urlsplit
+
+
+async def worker(host, port, path, deadline, latencies, errors, counter, bust):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.monotonic() < deadline:
+            target = path
+            if bust:
+                target += ('&' if '?' in path else '?') + f'_={next(counter)}'
+
+            started = time.monotonic()
+            writer.write(f'GET {target} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n\r\n'.encode())
+            await writer.drain()
+
+            status = await reader.readline()
+            length, chunked = 0, False
+            while (line := await reader.readline()) not in (b'\r\n', b''):
+                name, _, value = line.decode().partition(':')
+                if name.lower() == 'content-length':
+                    length = int(value)
+                elif name.lower() == 'transfer-encoding' and 'chunked' in value:
+                    chunked = True
+
+            if chunked:
+                while size := int((await reader.readline()).strip(), 16):
+                    await reader.readexactly(size + 2)
+                await reader.readline()
+            else:
+                await reader.readexactly(length)
+
+            latencies.append(time.monotonic() - started)
+            if not status.split()[1].startswith(b'2'):
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(url, concurrency, duration, bust):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    latencies, errors, counter = [], [], itertools.count()
+
+    started = time.monotonic()
+    await asyncio.gather(*[
+        worker(parts.hostname, parts.port or 80, path, started + duration, latencies, errors, counter, bust)
+        for _ in range(concurrency)
+    ])
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"{url} c={concurrency}: {len(latencies) / elapsed:.0f} req/s, "
+          f"p50 {percentile(0.50):.1f} ms, p99 {percentile(0.99):.1f} ms, {len(errors)} errors")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('url')
+    parser.add_argument('-c', '--concurrency', type=int, default=128)
+    parser.add_argument('-d', '--duration', type=float, default=15)
+    parser.add_argument('--bust', action='store_true')
+    options = parser.parse_args()
+    asyncio.run(run(options.url, options.concurrency, options.duration, options.bust))
+
+
+if __name__ == '__main__':
+    main()
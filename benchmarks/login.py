@@ -0,0 +1,56 @@
+"""
+Logins per second through registration.serializers.LoginSerializer on a
+single core, against the time of one password hash check. Runs on a
+throwaway test database.
+
+    python benchmarks/login.py
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from registration.serializers import LoginSerializer  # noqa: E402
+
+ROUNDS = 20
+PASSWORD = 'secret-pass-123'
+
+
+def per_second(function):
+    function()
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        function()
+    return ROUNDS / (time.perf_counter() - started)
+
+
+def main():
+    name = connection.creation.create_test_db(verbosity=0)
+    try:
+        User.objects.bulk_create([User(username=f'user_{i}', password='!') for i in range(10000)])
+        user = User.objects.create_user(username='Ali', password=PASSWORD)
+
+        def login():
+            serializer = LoginSerializer(data={'username': 'ali', 'password': PASSWORD})
+            serializer.is_valid(raise_exception=True)
+
+        hashes = per_second(lambda: user.check_password(PASSWORD))
+        logins = per_second(login)
+        print(f"password checks: {hashes:6.1f}/s")
+        print(f"logins:          {logins:6.1f}/s ({hashes / logins:.2f} hashes per login)")
+    finally:
+        connection.creation.destroy_test_db(name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
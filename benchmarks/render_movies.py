@@ -0,0 +1,67 @@
+"""
+Time rendering one paginated page of 100 movies with DRF's JSONRenderer and
+with api.renderers.ORJSONRenderer.
+
+    python benchmarks/render_movies.py
+"""
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'movie.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from api.renderers import ORJSONRenderer  # noqa: E402
+from api.responses import envelope  # noqa: E402
+
+PAGE_SIZE = 100
+ROUNDS = 2000
+
+
+def make_page():
+    # the shape of a /api/v1/movie/ list item
+    results = [{
+        'id': i,
+        'photo_variants': {
+            'webp': {'160': f'http://localhost/media/movies/variants/{i:064x}/160.webp'},
+            'jpeg': {'160': f'http://localhost/media/movies/variants/{i:064x}/160.jpg'},
+        },
+        'title': f"Film {i}",
+        'slug': f"film-{i}",
+        'description': "Qorong'i tunda sodir bo'lgan voqealar haqida film. " * 6,
+        'duration': "1 soat 59 daqiqa 59 soniya",
+        'language': "O'zbek tilida",
+        'year': 2020,
+        'age_limit': '12+',
+        'like': 1200 + i,
+        'dislike': 30,
+        'view': 985000 + i,
+        'photo': f'http://localhost/media/movies/poster-{i}.jpg',
+        'photo_placeholder': 'data:image/jpeg;base64,' + 'A' * 400,
+        'created_at': '2026-10-18T12:00:00.000000+05:00',
+        'country': {'id': 1, 'name': "Fransiya", 'slug': 'fransiya'},
+        'genre': [{'id': 1, 'name': "Drama", 'slug': 'drama'}, {'id': 2, 'name': "Komediya", 'slug': 'komediya'}],
+        'episode_count': 24,
+        'trailer': {'title': f"Film {i} treyler", 'type': 'trailer', 'part': None,
+                    'embed_url': 'https://youtu.be/1ovgxN2VWNc'},
+    } for i in range(PAGE_SIZE)]
+    return envelope({'total': 100000, 'results': results})
+
+
+def main():
+    page = make_page()
+    for renderer in (JSONRenderer(), ORJSONRenderer()):
+        seconds = min(timeit.repeat(lambda: renderer.render(page), number=ROUNDS, repeat=5)) / ROUNDS
+        size = len(renderer.render(page))
+        print(f"{type(renderer).__name__:>16}: {seconds * 1e6:8.1f} µs per page, {size} bytes")
+
+
+if __name__ == '__main__':
+    main()
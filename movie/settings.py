@@ -9,7 +9,10 @@ https://docs.djangoproject.com/en/5.1/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
+import os
 from datetime import timedelta
+
+from celery.schedules import crontab
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -52,6 +55,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.replicas.ReplicaMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,11 +88,95 @@ WSGI_APPLICATION = 'movie.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+# DATABASE_PROFILE picks the database: 'sqlite' (default) for development and
+# single host deployments, 'postgresql' for everything else.
+
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'sqlite')
+
+if DATABASE_PROFILE == 'postgresql':
+    # Django's psycopg 3 connection pool, one per worker process. It can't be
+    # combined with persistent connections, set DB_POOL=0 behind an external
+    # pooler such as PgBouncer.
+    DB_POOL = os.environ.get('DB_POOL', '1') == '1'
+
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'movie'),
+            'USER': os.environ.get('POSTGRES_USER', 'movie'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL else 60,
+            'CONN_HEALTH_CHECKS': not DB_POOL,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': 2,
+                    'max_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+                    'timeout': 10,
+                },
+            } if DB_POOL else {},
+        }
+    }
+
+    # read replicas, POSTGRES_REPLICA_HOSTS is a comma separated list. They
+    # mirror the test database, so run the tests without it: test cases only
+    # allow the replica aliases they list in ``databases``.
+    for number, host in enumerate(filter(None, os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',')), start=1):
+        DATABASES[f'replica_{number}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            # reuse the connection across requests, checked before reuse
+            'CONN_MAX_AGE': 60,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # take the write lock when a transaction starts, so concurrent
+                # read-then-write transactions wait instead of failing
+                'transaction_mode': 'IMMEDIATE',
+                # SQLite's busy_timeout, in seconds
+                'timeout': 20,
+                # WAL lets readers run alongside the writer. With synchronous=NORMAL
+                # commits are only fsynced at checkpoints, a power loss can drop the
+                # last transactions but never corrupts the file.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=268435456;'
+                    'PRAGMA cache_size=-16000;'
+                ),
+            },
+            'TEST': {
+                # an in-memory database cannot be shared by concurrent test threads
+                'NAME': BASE_DIR / 'test_db.sqlite3',
+            },
+        }
+    }
+
+# Reads of safe-method requests go to a replica (see api.replicas), a replica
+# failing to connect is skipped for DATABASE_REPLICA_RETRY seconds
 
-DATABASES = {
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias.startswith('replica_')]
+DATABASE_REPLICA_RETRY = 30
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Response cache, view counters, revoked tokens and throttles all need a cache
+# shared by every worker in production, set CACHE_URL to a Redis URL. Without
+# it each process falls back to its own local memory cache, and view counters
+# and revoked tokens go to the database instead.
+
+CACHE_URL = os.environ.get('CACHE_URL')
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': CACHE_URL,
+    } if CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
@@ -97,9 +186,9 @@ DATABASES = {
 REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': "api.exceptions.exception",
 
-    # 'DEFAULT_RENDERER_CLASSES': [
-    #     'rest_framework.renderers.JSONRenderer',
-    # ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
     # 'DEFAULT_PARSER_CLASSES': [
     #     'rest_framework.parsers.JSONParser',
     # ],
@@ -112,16 +201,74 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.ScopedRateThrottle',
+        'api.throttling.SlidingWindowThrottle',
     ],
 
     'DEFAULT_THROTTLE_RATES': {
         'genre': '60/minute',
         'country': '60/minute',
         'movie': '60/minute',
+        'reaction': '30/minute',
+        'view': '120/minute',
+        'auth': '20/minute',
     }
 }
 
+# Sliding window throttle counters (see api.throttling)
+
+API_THROTTLE_CACHE_ALIAS = 'default'
+
+# Response cache for the catalogue read endpoints (see api.cache)
+
+API_CACHE_ALIAS = 'default'
+API_CACHE_TIMEOUT = 60 * 5
+API_CACHE_STALE_TIMEOUT = 60 * 10
+API_CACHE_LOCK_TIMEOUT = 10
+# entries missed within this many seconds of an invalidation are rebuilt from
+# the primary, a lagging replica would store old rows under the new version
+API_CACHE_PRIMARY_TIMEOUT = 30
+
+# Serve the catalogue reads with the async views in api.async_views, only
+# useful when running under ASGI (movie.asgi)
+API_ASYNC_VIEWS = os.environ.get('API_ASYNC_VIEWS') == '1'
+
+# Compression of API responses (see api.compression), negotiated from
+# Accept-Encoding. Views override it with a ``compression`` attribute and
+# actions with @action(compression=...), None turns it off.
+API_COMPRESSION = {
+    'min_size': 1024,
+    'levels': {'br': 5, 'gzip': 6},
+}
+
+# Write-behind view counter (see api.counters). The alias must point to a cache
+# shared by the web and Celery worker processes, None writes every view to the
+# database instead of buffering it in a cache the flush task cannot see.
+
+API_COUNTER_CACHE_ALIAS = 'default' if CACHE_URL else None
+API_COUNTER_BATCH_SIZE = 500
+API_COUNTER_DIRTY_TIMEOUT = 60 * 60
+API_COUNTER_LOCK_TIMEOUT = 60 * 5
+API_COUNTER_SLUG_TIMEOUT = 60 * 60 * 24
+
+# Movie full-text search (see api.search). None picks the backend matching the
+# database engine, otherwise a dotted path to a search backend class.
+
+MOVIE_SEARCH_BACKEND = None
+MOVIE_SEARCH_MAX_TERMS = 8
+
+# Similar movies (see api.similarity), the job holds batch size × movies scores
+# in memory at a time
+MOVIE_SIMILAR_COUNT = 10
+MOVIE_SIMILAR_BATCH_SIZE = 256
+
+# Trending movies (see api.trending), scores halve every MOVIE_TRENDING_HALF_LIFE
+# seconds without new activity
+MOVIE_TRENDING_HALF_LIFE = 60 * 60 * 12
+MOVIE_TRENDING_SIZE = 50
+
+# rows fetched per query by the streaming catalogue export
+MOVIE_EXPORT_CHUNK_SIZE = 2000
+
 # Simple JWT settings
 # https://django-rest-framework-simplejwt.readthedocs.io/en/latest/settings.html
 
@@ -136,6 +283,14 @@ SIMPLE_JWT = {
     "JTI_CLAIM": "jti",
 }
 
+# Revoked access tokens (see registration.revocation). The alias must point to
+# a cache shared by all workers, None checks every token against the database.
+# The local set bounds per-process memory.
+
+REVOKED_TOKEN_CACHE_ALIAS = 'default' if CACHE_URL else None
+REVOKED_TOKEN_LOCAL_SIZE = 10000
+TOKEN_FLUSH_BATCH_SIZE = 1000
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -175,6 +330,10 @@ STATIC_URL = 'static/'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Poster variants, generated in the background after upload
+MOVIE_PHOTO_WIDTHS = (160, 320, 640)
+MOVIE_PHOTO_QUALITY = 80
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -190,6 +349,9 @@ EMAIL_HOST_USER = 'alijonov.me@gmail.com'
 EMAIL_HOST_PASSWORD = 'YOUR EMAIL HOST PASSWORD'
 DEFAULT_FROM_EMAIL = f"MovieHub <{EMAIL_HOST_USER}>"
 
+# recipients per broadcast task, each task reuses one SMTP connection
+MESSAGE_BATCH_SIZE = 100
+
 # email verification and password reset timeout
 PASSWORD_RESET_TIMEOUT = 300
 
@@ -200,3 +362,22 @@ CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+
+CELERY_BEAT_SCHEDULE = {
+    'flush-movie-views': {
+        'task': 'api.tasks.flush_movie_views',
+        'schedule': 60,
+    },
+    'flush-expired-tokens': {
+        'task': 'registration.tasks.flush_expired_tokens',
+        'schedule': 60 * 60,
+    },
+    'update-trending-movies': {
+        'task': 'api.tasks.update_trending_movies',
+        'schedule': 60 * 10,
+    },
+    'rebuild-similar-movies': {
+        'task': 'api.tasks.rebuild_similar_movies',
+        'schedule': crontab(hour=3, minute=0),
+    },
+}
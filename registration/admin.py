@@ -5,9 +5,10 @@ from .models import BlacklistedAccessToken, Message
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ('id', 'subject', 'created_at')
+    list_display = ('id', 'subject', 'status', 'total_count', 'sent_count', 'failed_count', 'created_at')
     list_display_links = ('id', 'subject')
     search_fields = ('id', 'subject')
+    readonly_fields = ('status', 'total_count', 'sent_count', 'failed_count')
     list_per_page = 10
     actions_on_top = False
     actions_on_bottom = True
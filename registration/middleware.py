@@ -3,7 +3,7 @@ from rest_framework.permissions import SAFE_METHODS
 from django.http import JsonResponse
 from rest_framework import status
 
-from .models import BlacklistedAccessToken
+from .revocation import get_claims, is_revoked
 
 
 class BlackListAccessTokenMiddleware(MiddlewareMixin):
@@ -11,8 +11,8 @@ class BlackListAccessTokenMiddleware(MiddlewareMixin):
         if request.method not in SAFE_METHODS:
             headers = request.headers.get('Authorization', '')
             if headers.startswith('Bearer '):
-                token = headers.split(' ')[1]
-                if BlacklistedAccessToken.objects.filter(token=token).exists():
+                jti, _ = get_claims(headers.split(' ')[1])
+                if jti and is_revoked(jti):
                     return JsonResponse({
                         'data': None,
                         'error': {
@@ -0,0 +1,69 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:40
+
+import json
+from base64 import urlsafe_b64decode
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+
+def get_claims(token):
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return claims['jti'], datetime.fromtimestamp(claims['exp'], tz=timezone.utc)
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None, None
+
+
+def fill_jti_and_expiry(apps, schema_editor):
+    BlacklistedAccessToken = apps.get_model('registration', 'BlacklistedAccessToken')
+    now = datetime.now(tz=timezone.utc)
+
+    seen = set()
+    for row in BlacklistedAccessToken.objects.iterator():
+        jti, expires_at = get_claims(row.token)
+        # rows of already expired or unreadable tokens protect nothing
+        if jti is None or expires_at <= now or jti in seen:
+            row.delete()
+            continue
+
+        seen.add(jti)
+        row.jti = jti
+        row.expires_at = expires_at
+        row.save(update_fields=['jti', 'expires_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blacklistedaccesstoken',
+            name='jti',
+            field=models.CharField(max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='blacklistedaccesstoken',
+            name='expires_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(fill_jti_and_expiry, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='blacklistedaccesstoken',
+            name='token',
+        ),
+        migrations.AlterField(
+            model_name='blacklistedaccesstoken',
+            name='jti',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='blacklistedaccesstoken',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 20:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0002_blacklistedaccesstoken_jti_expires_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='message',
+            name='failed_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Yuborilmagan'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='sent_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Yuborilgan'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Kutilmoqda'), ('sending', 'Yuborilmoqda'), ('done', 'Yuborildi')], default='pending', max_length=10, verbose_name='Holati'),
+        ),
+        migrations.AddField(
+            model_name='message',
+            name='total_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Qabul qiluvchilar'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('registration', '0003_message_failed_count_message_sent_count_and_more'),
+    ]
+
+    # auth_user belongs to django.contrib.auth, so the index for the
+    # case-insensitive username lookups is created with raw SQL
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX auth_user_username_lower_idx ON auth_user (LOWER(username));',
+            'DROP INDEX auth_user_username_lower_idx;',
+        ),
+    ]
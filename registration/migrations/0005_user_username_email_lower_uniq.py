@@ -0,0 +1,54 @@
+# Generated by Django 5.1.15 on 2026-10-18 21:30
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_case_duplicates(apps, schema_editor):
+    # usernames and emails differing only in case could register before this
+    # migration, they have to be merged or renamed by hand first
+    User = apps.get_model('auth', 'User')
+
+    duplicates = []
+    for field, users in (('username', User.objects.all()), ('email', User.objects.exclude(email=''))):
+        values = (users.values(value=Lower(field))
+                  .annotate(count=Count('id'))
+                  .filter(count__gt=1)
+                  .values_list('value', flat=True))
+        for value in values:
+            ids = list(users.alias(value=Lower(field)).filter(value=value)
+                       .order_by('id').values_list('id', flat=True))
+            duplicates.append(f"{field} {value!r}: users {ids}")
+
+    if duplicates:
+        raise RuntimeError(
+            "Cannot create the case-insensitive unique indexes, these users "
+            "share a username or email that differs only in case:\n" + "\n".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registration', '0004_user_username_lower_idx'),
+    ]
+
+    # Registration relies on these instead of existence queries. Users
+    # created without an email (createsuperuser allows it) are left out of
+    # the email index.
+    operations = [
+        migrations.RunPython(check_case_duplicates, migrations.RunPython.noop),
+        migrations.RunSQL(
+            'DROP INDEX auth_user_username_lower_idx;',
+            'CREATE INDEX auth_user_username_lower_idx ON auth_user (LOWER(username));',
+        ),
+        migrations.RunSQL(
+            'CREATE UNIQUE INDEX auth_user_username_lower_uniq ON auth_user (LOWER(username));',
+            'DROP INDEX auth_user_username_lower_uniq;',
+        ),
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX auth_user_email_lower_uniq ON auth_user (LOWER(email)) WHERE email <> '';",
+            'DROP INDEX auth_user_email_lower_uniq;',
+        ),
+    ]
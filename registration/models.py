@@ -1,11 +1,23 @@
 from django.db import models
 
 
+MESSAGE_STATUSES = [
+    ('pending', "Kutilmoqda"),
+    ('sending', "Yuborilmoqda"),
+    ('done', "Yuborildi")
+]
+
+
 class Message(models.Model):
     subject = models.CharField(max_length=150, verbose_name="Mavzusi")
     message = models.TextField(verbose_name="Xabar matni")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Qo'shilgan vaqti")
 
+    status = models.CharField(max_length=10, choices=MESSAGE_STATUSES, default='pending', verbose_name="Holati")
+    total_count = models.PositiveIntegerField(default=0, verbose_name="Qabul qiluvchilar")
+    sent_count = models.PositiveIntegerField(default=0, verbose_name="Yuborilgan")
+    failed_count = models.PositiveIntegerField(default=0, verbose_name="Yuborilmagan")
+
     def __str__(self):
         return f"{self.subject} - {self.created_at}"
 
@@ -16,8 +28,9 @@ class Message(models.Model):
 
 
 class BlacklistedAccessToken(models.Model):
-    token = models.CharField(max_length=500)
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
     blacklisted_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return self.token
+        return self.jti
@@ -0,0 +1,107 @@
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import BlacklistedAccessToken
+
+REVOKED_KEY = 'registration:revoked:{}'
+WARM_KEY = 'registration:revoked:warm'
+
+# jti -> expiry timestamp of the revoked tokens seen by this process
+_revoked = {}
+_lock = threading.Lock()
+
+
+def get_cache():
+    # None when no shared cache is configured, tokens are then checked against
+    # the database (see api.checks)
+    if settings.REVOKED_TOKEN_CACHE_ALIAS is None:
+        return None
+    return caches[settings.REVOKED_TOKEN_CACHE_ALIAS]
+
+
+def get_claims(token):
+    # the signature is checked by the authentication class, only the
+    # claims are needed here
+    try:
+        access = AccessToken(token, verify=False)
+    except TokenError:
+        return None, None
+    return access.get(api_settings.JTI_CLAIM), access.get('exp')
+
+
+def _remember(jti, exp):
+    with _lock:
+        if len(_revoked) >= settings.REVOKED_TOKEN_LOCAL_SIZE:
+            now = time.time()
+            for key in [key for key, value in _revoked.items() if value <= now]:
+                del _revoked[key]
+        if len(_revoked) < settings.REVOKED_TOKEN_LOCAL_SIZE:
+            _revoked[jti] = exp
+
+
+def _store(cache, jti, exp):
+    timeout = int(exp - time.time())
+    if timeout > 0:
+        cache.set(REVOKED_KEY.format(jti), exp, timeout=timeout)
+
+
+def _warm(cache):
+    # an empty shared cache (restart, eviction) is refilled once from the
+    # rows that can still belong to live tokens
+    if cache.get(WARM_KEY) is not None:
+        return
+
+    live = BlacklistedAccessToken.objects.filter(expires_at__gt=timezone.now())
+    for jti, expires_at in live.values_list('jti', 'expires_at').iterator():
+        _store(cache, jti, expires_at.timestamp())
+
+    # an evicted key is missed until the next warm-up, repeat it at least
+    # once per access token lifetime
+    lifetime = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    cache.set(WARM_KEY, 1, timeout=int(lifetime))
+
+
+def revoke(jti, exp):
+    BlacklistedAccessToken.objects.get_or_create(
+        jti=jti,
+        defaults={'expires_at': datetime.fromtimestamp(exp, tz=dt_timezone.utc)}
+    )
+    _remember(jti, exp)
+
+    cache = get_cache()
+    if cache is not None:
+        _store(cache, jti, exp)
+
+
+def is_revoked(jti):
+    exp = _revoked.get(jti)
+    if exp is not None:
+        if exp > time.time():
+            return True
+        with _lock:
+            _revoked.pop(jti, None)
+
+    cache = get_cache()
+    if cache is None:
+        expires_at = BlacklistedAccessToken.objects.filter(
+            jti=jti, expires_at__gt=timezone.now()
+        ).values_list('expires_at', flat=True).first()
+        if expires_at is None:
+            return False
+        exp = expires_at.timestamp()
+    else:
+        _warm(cache)
+        exp = cache.get(REVOKED_KEY.format(jti))
+        if exp is None:
+            return False
+
+    _remember(jti, exp)
+    return True
@@ -1,22 +1,68 @@
 import re
+from contextlib import contextmanager
 
-from django.contrib.auth.models import User
+from django.contrib.auth.models import User, update_last_login
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import BooleanField, Func
+from django.db.models.functions import Lower
 
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
 
 from registration.utils import send_verification_email
 
 
+# case-insensitive unique indexes on auth_user, see migration 0005
+UNIQUE_INDEXES = {
+    'auth_user_username_lower_uniq': ('username', "A user with that username already exists."),
+    'auth_user_email_lower_uniq': ('email', "This email is already in use."),
+    # the case-sensitive unique constraint of the username column
+    'auth_user.username': ('username', "A user with that username already exists."),
+    'auth_user_username_key': ('username', "A user with that username already exists."),
+}
+
+
+def filter_username(username):
+    # matches the LOWER(username) index, iexact compiles to LIKE on SQLite
+    return User.objects.alias(username_lower=Lower('username')).filter(username_lower=username.lower())
+
+
+class NotEmpty(Func):
+    # a literal, not a parameter, so the planner can match the partial index
+    template = "%(expressions)s <> ''"
+    output_field = BooleanField()
+
+
+def filter_email(email):
+    # the email index leaves out empty emails (WHERE email <> '')
+    return User.objects.alias(email_lower=Lower('email')).filter(NotEmpty('email'), email_lower=email.lower())
+
+
+@contextmanager
+def unique_user_fields():
+    # username and email are checked by the unique indexes on insert, a
+    # separate existence query would race with concurrent registrations
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as e:
+        for index, (field, message) in UNIQUE_INDEXES.items():
+            if index in str(e):
+                raise serializers.ValidationError({field: message})
+        raise
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'is_active']
         read_only_fields = ['id', 'email', 'is_active']
         extra_kwargs = {
-            'username': {'required': False},
+            'username': {'required': False, 'validators': [UnicodeUsernameValidator()]},
             'first_name': {'required': False},
             'last_name': {'required': False},
         }
@@ -29,9 +75,6 @@ class UserSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Username must be 3–30 characters, start with a letter or underscore, "
                                               "and use only letters, numbers, or underscores.")
 
-        if User.objects.filter(username__iexact=value).exists():
-            raise serializers.ValidationError("A user with that username already exists.")
-
         return value
 
     def _validate_alpha_field(self, field_name, value):
@@ -49,6 +92,10 @@ class UserSerializer(serializers.ModelSerializer):
 
         return attrs
 
+    def update(self, instance, validated_data):
+        with unique_user_fields():
+            return super().update(instance, validated_data)
+
 
 class RegisterSerializer(serializers.ModelSerializer):
     password1 = serializers.CharField(min_length=8, max_length=128, write_only=True, style={'input_type': 'password'})
@@ -58,6 +105,7 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = User
         fields = ['username', 'first_name', 'last_name', 'email', 'password1', 'password2']
         extra_kwargs = {
+            'username': {'validators': [UnicodeUsernameValidator()]},
             'email': {
                 'required': True,
                 'allow_null': False,
@@ -70,18 +118,12 @@ class RegisterSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Username must be 3–30 characters, start with a letter or underscore, "
                                               "and use only letters, numbers, or underscores.")
 
-        if User.objects.filter(username__iexact=value).exists():
-            raise serializers.ValidationError("A user with that username already exists.")
-
         return value
 
     def validate_email(self, value):
         if not re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', value):
             raise serializers.ValidationError("Invalid email entered.")
 
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError("This email is already in use.")
-
         return value
 
     def _validate_alpha_field(self, field_name, value):
@@ -115,11 +157,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         validated_data.pop('password2')
         password = validated_data.pop('password1')
 
-        user = User.objects.create_user(
-            password=password,
-            is_active=False,
-            **validated_data
-        )
+        with unique_user_fields():
+            user = User.objects.create_user(
+                password=password,
+                is_active=False,
+                **validated_data
+            )
 
         request = self.context.get('request')
         if request:
@@ -140,7 +183,7 @@ class LoginSerializer(TokenObtainPairSerializer):
             })
 
         try:
-            user = User.objects.get(username__iexact=username)
+            user = filter_username(username).get()
         except User.DoesNotExist:
             raise serializers.ValidationError({
                 'username': "This username is not registered."
@@ -156,15 +199,16 @@ class LoginSerializer(TokenObtainPairSerializer):
                 'username': "This user is not verified yet."
             })
 
-        data = super().validate({
-            'username': user.username,
-            'password': password
-        })
+        # the password is already checked, authenticating again through
+        # super().validate() would hash it a second time
+        refresh = self.get_token(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            update_last_login(None, user)
 
         return {
             'data': {
-                'access': data.get('access'),
-                'refresh': data.get('refresh'),
+                'access': str(refresh.access_token),
+                'refresh': str(refresh),
                 'user': {
                     'userId': user.id,
                     'first_name': user.first_name or None,
@@ -230,7 +274,7 @@ class ResendVerificationEmailSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         try:
-            user = User.objects.get(email=email)
+            user = filter_email(email).get()
         except User.DoesNotExist:
             raise serializers.ValidationError({'email': "No user with this email address."})
 
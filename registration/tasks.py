@@ -1,6 +1,12 @@
-from django.core.mail import EmailMessage
+from django.contrib.auth.models import User
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.utils import timezone
 from celery import shared_task
 from django.conf import settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from .models import BlacklistedAccessToken, Message
 
 
 @shared_task
@@ -14,4 +20,103 @@ def send_message(subject, message, bcc_list):
         from_email=settings.DEFAULT_FROM_EMAIL,
         bcc=bcc_list
     )
-    email.send()
\ No newline at end of file
+    email.send()
+
+
+def get_recipient_batches(batch_size):
+    recipients = (User.objects
+                  .filter(email__isnull=False)
+                  .exclude(email='')
+                  .order_by('id')
+                  .values_list('id', flat=True))
+
+    batch = []
+    for user_id in recipients.iterator(chunk_size=batch_size):
+        batch.append(user_id)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+@shared_task
+def broadcast_message(message_id):
+    # batches are queued as they are read instead of collected into one
+    # chord, whichever finishes last marks the message done
+    total = 0
+    for batch in get_recipient_batches(settings.MESSAGE_BATCH_SIZE):
+        send_message_batch.delay(message_id, batch)
+        total += len(batch)
+
+    Message.objects.filter(pk=message_id).update(status='sending', total_count=total)
+    finish_broadcast(message_id)
+
+
+@shared_task
+def send_message_batch(message_id, user_ids):
+    sent = 0
+    connection = get_connection()
+    try:
+        message = Message.objects.only('subject', 'message').get(pk=message_id)
+        emails = User.objects.filter(id__in=user_ids).exclude(email='').values_list('email', flat=True)
+
+        connection.open()
+        for email in emails:
+            try:
+                EmailMessage(
+                    subject=message.subject,
+                    body=message.message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    to=[email],
+                    connection=connection
+                ).send()
+                sent += 1
+            except Exception:
+                # a bad address or header only fails its own email
+                continue
+    finally:
+        # every id not sent counts as failed, including users deleted or left
+        # without an email since they were queued, so the broadcast finishes
+        Message.objects.filter(pk=message_id).update(
+            sent_count=F('sent_count') + sent,
+            failed_count=F('failed_count') + len(user_ids) - sent
+        )
+        finish_broadcast(message_id)
+        connection.close()
+
+    return sent
+
+
+@shared_task
+def finish_broadcast(message_id, *args):
+    # the status is pending until every batch has been queued and total_count
+    # is known
+    Message.objects.filter(
+        pk=message_id,
+        status='sending',
+        total_count__lte=F('sent_count') + F('failed_count')
+    ).update(status='done')
+
+
+def delete_in_batches(queryset, batch_size):
+    deleted = 0
+    while True:
+        batch = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+
+        queryset.model.objects.filter(pk__in=batch).delete()
+        deleted += len(batch)
+
+
+@shared_task
+def flush_expired_tokens(batch_size=None):
+    batch_size = batch_size or settings.TOKEN_FLUSH_BATCH_SIZE
+    now = timezone.now()
+
+    # deleting an outstanding refresh token cascades to its blacklist entry
+    return {
+        'access': delete_in_batches(BlacklistedAccessToken.objects.filter(expires_at__lt=now), batch_size),
+        'refresh': delete_in_batches(OutstandingToken.objects.filter(expires_at__lt=now), batch_size),
+    }
@@ -1,3 +1,298 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from importlib import import_module
+from smtplib import SMTPException
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from movie.celery import app as celery_app
+
+from . import revocation
+from .middleware import BlackListAccessTokenMiddleware
+from .models import BlacklistedAccessToken, Message
+from .serializers import filter_email, filter_username
+from .tasks import broadcast_message, flush_expired_tokens, send_message_batch
+
+
+def run_tasks_eagerly(testcase):
+    eager = {
+        'CELERY_TASK_ALWAYS_EAGER': True,
+        'CELERY_BROKER_URL': 'memory://',
+        'CELERY_RESULT_BACKEND': 'cache+memory://'
+    }
+    previous = {key: celery_app.conf.get(key) for key in eager}
+    celery_app.conf.update(eager)
+    testcase.addCleanup(celery_app.conf.update, previous)
+
+
+@override_settings(REVOKED_TOKEN_CACHE_ALIAS='default')
+class RevokedAccessTokenTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="ali", password="secret-pass-123")
+
+    def setUp(self):
+        cache.clear()
+        revocation._revoked.clear()
+        self.refresh = RefreshToken.for_user(self.user)
+        self.access = str(self.refresh.access_token)
+        self.middleware = BlackListAccessTokenMiddleware(lambda request: None)
+
+    def logout(self):
+        return self.client.post('/auth/logout/', {'refresh': str(self.refresh)},
+                                HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    def check(self):
+        request = RequestFactory().post('/', HTTP_AUTHORIZATION=f'Bearer {self.access}')
+        return self.middleware.process_request(request)
+
+    def test_logout_revokes_access_token(self):
+        self.assertIsNone(self.check())
+        self.assertEqual(self.logout().status_code, 200)
+
+        response = self.logout()
+        self.assertEqual(response.status_code, 403)
+
+    def test_check_makes_no_database_query(self):
+        self.logout()
+        revocation._revoked.clear()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.check().status_code, 403)
+            self.assertEqual(self.check().status_code, 403)
+
+    def test_cold_cache_is_warmed_from_database(self):
+        self.logout()
+        cache.clear()
+        revocation._revoked.clear()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.check().status_code, 403)
+
+        self.access = str(RefreshToken.for_user(self.user).access_token)
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.check())
+
+    def test_expired_rows_are_not_loaded(self):
+        jti, _ = revocation.get_claims(self.access)
+        BlacklistedAccessToken.objects.create(jti=jti, expires_at=timezone.now() - timedelta(minutes=1))
+
+        self.assertIsNone(self.check())
+
+    def test_warm_up_expires_with_token_lifetime(self):
+        self.check()
+
+        with mock.patch('time.time', return_value=time.time() + 60 * 60 + 1):
+            self.assertIsNone(cache.get(revocation.WARM_KEY))
+
+    @override_settings(REVOKED_TOKEN_CACHE_ALIAS=None)
+    def test_without_shared_cache_checks_database(self):
+        self.logout()
+        revocation._revoked.clear()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.check().status_code, 403)
+        self.assertIsNone(cache.get(revocation.WARM_KEY))
+
+        self.access = str(RefreshToken.for_user(self.user).access_token)
+        with self.assertNumQueries(1):
+            self.assertIsNone(self.check())
+
+
+class LoginTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Ali", password="secret-pass-123")
+
+    def test_password_is_hashed_once(self):
+        verify = mock.patch.object(PBKDF2PasswordHasher, 'verify', autospec=True,
+                                   side_effect=PBKDF2PasswordHasher.verify)
+        with verify as hasher:
+            response = self.client.post('/auth/login/', {'username': 'ali', 'password': 'secret-pass-123'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(hasher.call_count, 1)
+
+        data = response.json()['data']
+        self.assertEqual(data['user']['userId'], self.user.id)
+        self.assertEqual(RefreshToken(data['refresh'])['user_id'], str(self.user.id))
+
+    def test_wrong_password(self):
+        response = self.client.post('/auth/login/', {'username': 'Ali', 'password': 'wrong-pass-123'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RegisterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(username="Ali", email="Ali@Example.com", password="secret-pass-123")
+
+    def setUp(self):
+        # the verification email is sent by a task
+        run_tasks_eagerly(self)
+
+    def register(self, username, email):
+        return self.client.post('/auth/register/', {
+            'username': username,
+            'email': email,
+            'first_name': "Vali",
+            'last_name': "Valiyev",
+            'password1': "long-secret-123",
+            'password2': "long-secret-123",
+        })
+
+    def test_taken_username_and_email_are_case_insensitive(self):
+        response = self.register("ALI", "vali@example.com")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('username', response.json()['error']['errorMsg'])
+
+        response = self.register("vali", "ali@example.com")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json()['error']['errorMsg'])
+
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_single_insert_without_existence_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register("vali", "vali@example.com")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT')])
+        self.assertEqual(len(mail.outbox), 1)
+
+    @skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite's")
+    def test_lookups_use_unique_indexes(self):
+        plan = filter_email("ALI@example.com").explain()
+        self.assertIn('USING INDEX auth_user_email_lower_uniq', plan)
+
+        plan = filter_username("ALI").explain()
+        self.assertIn('USING INDEX auth_user_username_lower_uniq', plan)
+
+        self.assertEqual(filter_email("ALI@example.com").get().username, "Ali")
+        self.assertFalse(filter_email("").exists())
+
+
+class CaseDuplicatesMigrationTest(TestCase):
+
+    def test_lists_users_to_fix(self):
+        migration = import_module('registration.migrations.0005_user_username_email_lower_uniq')
+        with connection.cursor() as cursor:
+            # dropped for this test only, TestCase rolls the DDL back
+            cursor.execute('DROP INDEX auth_user_username_lower_uniq')
+            cursor.execute('DROP INDEX auth_user_email_lower_uniq')
+
+        migration.check_case_duplicates(apps, None)
+
+        users = User.objects.bulk_create([
+            User(username="Ali", email="ali@example.com"),
+            User(username="ali", email="vali@example.com"),
+            User(username="vali", email="Vali@Example.com"),
+            User(username="g'ani", email=""),
+            User(username="sobir", email=""),
+        ])
+
+        with self.assertRaisesMessage(RuntimeError, f"username 'ali': users {[users[0].id, users[1].id]}"):
+            migration.check_case_duplicates(apps, None)
+        with self.assertRaisesMessage(RuntimeError, f"email 'vali@example.com': users {[users[1].id, users[2].id]}"):
+            migration.check_case_duplicates(apps, None)
+
+
+class FlushExpiredTokensTest(TestCase):
+
+    def test_deletes_only_expired_rows_in_batches(self):
+        now = timezone.now()
+        BlacklistedAccessToken.objects.bulk_create(
+            [BlacklistedAccessToken(jti=f'old-{i}', expires_at=now - timedelta(hours=1)) for i in range(5)]
+            + [BlacklistedAccessToken(jti='live', expires_at=now + timedelta(hours=1))]
+        )
+        user = User.objects.create_user(username="ali", password="secret-pass-123")
+        OutstandingToken.objects.create(user=user, jti='old', token='x', expires_at=now - timedelta(hours=1))
+        OutstandingToken.objects.create(user=user, jti='live', token='y', expires_at=now + timedelta(hours=1))
+
+        self.assertEqual(flush_expired_tokens(batch_size=2), {'access': 5, 'refresh': 1})
+        self.assertEqual(list(BlacklistedAccessToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+
+
+class BroadcastMessageTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            [User(username=f"user_{i}", email=f"user_{i}@example.com") for i in range(7)]
+            + [User(username="no_email", email="")]
+        )
+
+    def setUp(self):
+        # run the batches in-process, without a broker
+        run_tasks_eagerly(self)
+
+    @override_settings(MESSAGE_BATCH_SIZE=3)
+    def test_sends_one_email_per_recipient_in_batches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            message = Message.objects.create(subject="Yangilik", message="Yangi filmlar qo'shildi")
+
+        message.refresh_from_db()
+        self.assertEqual(len(mail.outbox), 7)
+        self.assertEqual(mail.outbox[0].to, ['user_0@example.com'])
+        self.assertEqual((message.status, message.total_count, message.sent_count, message.failed_count),
+                         ('done', 7, 7, 0))
+
+    @override_settings(MESSAGE_BATCH_SIZE=3)
+    def test_failures_are_counted(self):
+        message = Message.objects.create(subject="Yangilik", message="Matn")
+
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=[1, SMTPException, 1] * 3):
+            broadcast_message(message.id)
+
+        message.refresh_from_db()
+        self.assertEqual((message.sent_count, message.failed_count), (5, 2))
+
+    @override_settings(MESSAGE_BATCH_SIZE=3)
+    def test_last_batch_marks_message_done(self):
+        message = Message.objects.create(subject="Yangilik", message="Matn")
+
+        with mock.patch('registration.tasks.send_message_batch.delay') as delay:
+            broadcast_message(message.id)
+
+        self.assertEqual([len(call.args[1]) for call in delay.call_args_list], [3, 3, 1])
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.total_count), ('sending', 7))
+
+        for call in delay.call_args_list:
+            send_message_batch(*call.args)
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.sent_count), ('done', 7))
+
+    @override_settings(MESSAGE_BATCH_SIZE=3)
+    def test_unresolved_and_unexpected_failures_still_finish(self):
+        message = Message.objects.create(subject="Yangilik", message="Matn")
+
+        with mock.patch('registration.tasks.send_message_batch.delay') as delay:
+            broadcast_message(message.id)
+
+        # queued users that were deleted or lost their email meanwhile
+        User.objects.filter(username='user_0').delete()
+        User.objects.filter(username='user_1').update(email='')
+
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=[1, ValueError, 1, 1, 1]):
+            for call in delay.call_args_list:
+                send_message_batch(*call.args)
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.sent_count, message.failed_count), ('done', 4, 3))
@@ -10,7 +10,7 @@ from rest_framework_simplejwt.views import TokenObtainPairView
 
 from .serializers import *
 from .permissions import IsNotAuthenticated
-from .models import BlacklistedAccessToken
+from .revocation import get_claims, revoke
 
 
 class UserView(generics.RetrieveUpdateAPIView):
@@ -53,6 +53,7 @@ class RegisterView(generics.CreateAPIView):
     queryset = User
     serializer_class = RegisterSerializer
     permission_classes = [IsNotAuthenticated]
+    throttle_scope = 'auth'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -76,6 +77,7 @@ class RegisterView(generics.CreateAPIView):
 
 class LoginView(TokenObtainPairView):
     serializer_class = LoginSerializer
+    throttle_scope = 'auth'
 
 
 class LogoutView(generics.GenericAPIView):
@@ -92,8 +94,9 @@ class LogoutView(generics.GenericAPIView):
 
         headers = request.headers.get('Authorization', '')
         if headers.startswith('Bearer '):
-            access = headers.split(' ')[1]
-            BlacklistedAccessToken.objects.create(token=access)
+            jti, exp = get_claims(headers.split(' ')[1])
+            if jti and exp:
+                revoke(jti, exp)
 
         return Response({
             'error': None,
@@ -103,6 +106,7 @@ class LogoutView(generics.GenericAPIView):
 
 class VerifyEmailView(APIView):
     permission_classes = [IsNotAuthenticated]
+    throttle_scope = 'auth'
 
     def get(self, request, uidb64, token):
         try:
@@ -147,6 +151,7 @@ class VerifyEmailView(APIView):
 class ResendVerificationEmailView(generics.CreateAPIView):
     serializer_class = ResendVerificationEmailSerializer
     permission_classes = [IsNotAuthenticated]
+    throttle_scope = 'auth'
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -171,6 +176,7 @@ class ResendVerificationEmailView(generics.CreateAPIView):
 class ChangePasswordView(generics.GenericAPIView):
     serializer_class = ChangePasswordSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = 'auth'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)